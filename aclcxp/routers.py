@@ -0,0 +1,111 @@
+"""
+Public read traffic on a replica database, everything else on the primary.
+
+With settings.DATABASE_REPLICA naming a second alias (ACLCXP_DB_REPLICA),
+ReplicaRoutingMiddleware marks GET and HEAD requests outside the admin as
+replica reads and PrimaryReplicaRouter sends their queries there: the
+public pages and the API. Writes always go to the primary, and so does
+everything else: admin pages, POSTs, management commands, signal handlers
+outside a request, the test suite.
+
+Read-your-writes: once a request writes, its later reads use the primary,
+and the response sets a cookie that keeps the client on the primary for
+REPLICA_STICKY_SECONDS, longer than the replica should lag. A scorekeeper
+who just saved a placement sees it on the public pages at once; other
+viewers see it when the replica catches up.
+"""
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.urls import NoReverseMatch, reverse
+
+STICKY_COOKIE = 'aclcxp_primary'
+SAFE_METHODS = ('GET', 'HEAD')
+# the database cache's version counters and locks must never lag
+PRIMARY_ONLY_APPS = {'django_cache'}
+
+_current = ContextVar('aclcxp_db_routing', default=None)
+
+
+class RoutingState:
+    __slots__ = ['replica', 'wrote']
+
+    def __init__(self, replica):
+        self.replica = replica
+        self.wrote = False
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _current.get()
+        if state is None or not state.replica or state.wrote or model._meta.app_label in PRIMARY_ONLY_APPS:
+            return None
+        return settings.DATABASE_REPLICA
+
+    def db_for_write(self, model, **hints):
+        state = _current.get()
+        if state is not None and model._meta.app_label not in PRIMARY_ONLY_APPS:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # the replica holds the same rows
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+def _admin_prefix():
+    try:
+        return reverse('admin:index')
+    except NoReverseMatch:
+        return None
+
+
+def reads_from_replica(request):
+    if not getattr(settings, 'DATABASE_REPLICA', None):
+        return False
+    if request.method not in SAFE_METHODS or STICKY_COOKIE in request.COOKIES:
+        return False
+    admin = _admin_prefix()
+    return not (admin and request.path_info.startswith(admin))
+
+
+class ReplicaRoutingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        state = RoutingState(reads_from_replica(request))
+        token = _current.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.stick(response, state)
+
+    async def __acall__(self, request):
+        state = RoutingState(reads_from_replica(request))
+        token = _current.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.stick(response, state)
+
+    def stick(self, response, state):
+        if state.wrote and getattr(settings, 'DATABASE_REPLICA', None):
+            response.set_cookie(
+                STICKY_COOKIE, '1', max_age=settings.REPLICA_STICKY_SECONDS, httponly=True, samesite='Lax',
+            )
+        return response
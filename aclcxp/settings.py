@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -41,6 +42,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # first, so its timings cover every other middleware
+    'leaderboard.timing.RequestTimingMiddleware',
+    # outside the session middleware, so saving a session counts as a write
+    'aclcxp.routers.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -54,7 +59,8 @@ ROOT_URLCONF = 'aclcxp.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates with render time in the Server-Timing header (leaderboard.timing)
+        'BACKEND': 'leaderboard.timing.TimedDjangoTemplates',
         'DIRS': [BASE_DIR / "templates"],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -69,15 +75,152 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'aclcxp.wsgi.application'
 
+# The live standings stream (/live/standings/) needs the ASGI server, e.g.
+# uvicorn aclcxp.asgi:application
+ASGI_APPLICATION = 'aclcxp.asgi.application'
+
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# ACLCXP_DB=sqlite (default) or postgresql. PostgreSQL needs psycopg and reads
+# ACLCXP_DB_NAME/USER/PASSWORD/HOST/PORT. To reuse PostgreSQL connections, set
+# ACLCXP_DB_POOL=1 for psycopg's pool (pip install "psycopg[pool]"), sized by
+# ACLCXP_DB_POOL_MIN/MAX.
+
+DB_BACKEND = os.environ.get('ACLCXP_DB', 'sqlite')
+# Seconds a connection is kept across requests; 0 closes it after each one.
+# Keep 0 under ASGI: every request runs in a fresh worker thread with its own
+# connection, so persistent ones pile up instead of being reused.
+CONN_MAX_AGE = int(os.environ.get('ACLCXP_DB_CONN_MAX_AGE', 0))
+
+if DB_BACKEND == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('ACLCXP_DB_NAME', 'aclcxp'),
+            'USER': os.environ.get('ACLCXP_DB_USER', ''),
+            'PASSWORD': os.environ.get('ACLCXP_DB_PASSWORD', ''),
+            'HOST': os.environ.get('ACLCXP_DB_HOST', ''),
+            'PORT': os.environ.get('ACLCXP_DB_PORT', ''),
+            'CONN_MAX_AGE': CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {},
+        }
+    }
+    if os.environ.get('ACLCXP_DB_POOL') == '1':
+        # the pool keeps connections open; Django requires CONN_MAX_AGE = 0 with it
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': int(os.environ.get('ACLCXP_DB_POOL_MIN', 2)),
+            'max_size': int(os.environ.get('ACLCXP_DB_POOL_MAX', 10)),
+        }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('ACLCXP_DB_NAME', BASE_DIR / 'db.sqlite3'),
+            'CONN_MAX_AGE': CONN_MAX_AGE,
+            'OPTIONS': {
+                # writers take the lock up front and wait for it (leaderboard.database)
+                'transaction_mode': 'IMMEDIATE',
+            },
+        }
+    }
+
+# A read replica for public pages and the API (aclcxp.routers). ACLCXP_DB_REPLICA
+# is the replica's SQLite file (kept current with `manage.py sync_replica`) or
+# its PostgreSQL host. Under test it mirrors the test database.
+if os.environ.get('ACLCXP_DB_REPLICA'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'HOST' if DB_BACKEND == 'postgresql' else 'NAME': os.environ['ACLCXP_DB_REPLICA'],
+        'OPTIONS': dict(DATABASES['default']['OPTIONS']),
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICA = 'replica'
+    DATABASE_ROUTERS = ['aclcxp.routers.PrimaryReplicaRouter']
+else:
+    DATABASE_REPLICA = None
+# seconds a client that wrote keeps reading the primary
+REPLICA_STICKY_SECONDS = int(os.environ.get('ACLCXP_REPLICA_STICKY_SECONDS', 10))
+
+# Run on every new SQLite connection (leaderboard.database); ACLCXP_SQLITE_WAL=0
+# keeps SQLite's defaults
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': int(os.environ.get('ACLCXP_SQLITE_BUSY_TIMEOUT', 5000)),
+} if os.environ.get('ACLCXP_SQLITE_WAL', '1') == '1' else {}
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# ACLCXP_CACHE=locmem (default, single worker), file or db (shared by workers;
+# run `manage.py createcachetable` first for db)
+
+CACHE_BACKEND = os.environ.get('ACLCXP_CACHE', 'locmem')
+
+if CACHE_BACKEND == 'file':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ.get('ACLCXP_CACHE_LOCATION', BASE_DIR / '.cache'),
+        }
+    }
+elif CACHE_BACKEND == 'db':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'aclcxp_cache',
+        }
     }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'aclcxp',
+        }
+    }
+
+
+# Rendered public pages (leaderboard.page_cache), in seconds
+PAGE_CACHE_TIMEOUT = int(os.environ.get('ACLCXP_PAGE_CACHE_TIMEOUT', 600))
+
+
+# Views over their @query_budget raise instead of logging a warning
+# (leaderboard.timing); the test suite turns this on
+QUERY_BUDGET_STRICT = os.environ.get('ACLCXP_QUERY_BUDGET_STRICT', '') == '1'
+
+# Per-request timings (leaderboard.requests) go to the console while DEBUG is
+# on; data migration progress (leaderboard.backfill) always does
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'filters': {
+        'require_debug_true': {'()': 'django.utils.log.RequireDebugTrue'},
+    },
+    'handlers': {
+        'console': {
+            'level': 'INFO',
+            'filters': ['require_debug_true'],
+            'class': 'logging.StreamHandler',
+        },
+        'progress': {
+            'level': 'INFO',
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'leaderboard.requests': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        },
+        'leaderboard.backfill': {
+            'handlers': ['progress'],
+            'level': 'INFO',
+        },
+    },
 }
 
 
@@ -117,6 +260,23 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+STATIC_ROOT = os.environ.get('ACLCXP_STATIC_ROOT', BASE_DIR / 'staticfiles')
+
+# With DEBUG off, collectstatic writes content-hashed names plus .gz/.br
+# copies (leaderboard.storage) and /static/ is served with far-future
+# headers by leaderboard.views.static_file
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': (
+            'django.contrib.staticfiles.storage.StaticFilesStorage' if DEBUG
+            else 'leaderboard.storage.CompressedManifestStaticFilesStorage'
+        ),
+    },
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -124,7 +284,10 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 NPM_BIN_PATH = "C:/Program Files/nodejs/npm.cmd"
 
-STATICFILES_DIRS = [BASE_DIR / "static"]
+# Responsive image variants written by `manage.py build_images`
+RESPONSIVE_IMAGES_DIR = Path(os.environ.get('ACLCXP_RESPONSIVE_IMAGES_DIR', BASE_DIR / 'static_build'))
+
+STATICFILES_DIRS = [BASE_DIR / "static", ('responsive', RESPONSIVE_IMAGES_DIR)]
 
 REST_FRAMEWORK = {
     # Use Django's standard `django.contrib.auth` permissions,
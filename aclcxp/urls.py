@@ -14,17 +14,21 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+from django.conf import settings
 from django.contrib import admin
 from django.contrib.auth.models import User
-from django.urls import path, include
-from leaderboard.views import landing_page
+from django.urls import path, include, re_path
+from leaderboard.views import landing_page, static_file
 
 
 # Wire up our API using automatic URL routing.
 # Additionally, we include login URLs for the browsable API.
 urlpatterns = [
     path('products/', admin.site.urls),
+    path('api/v1/', include('leaderboard.api_url')),
     path('', include('leaderboard.urls')),
+    # collected files with far-future headers when DEBUG is off
+    re_path(rf"^{settings.STATIC_URL.lstrip('/')}(?P<path>.+)$", static_file, name='static_file'),
 ]
 
 # urlpatterns = [
@@ -1,22 +1,265 @@
+import io
+
 from django import forms
-from django.contrib import admin
-from django.utils.html import format_html
-from .models import Participation, Activity, House_Cup_Year, House, Score
+from django.contrib import admin, messages
+from django.core.exceptions import PermissionDenied, ValidationError
+from django.db import transaction
+from django.db.models import Count
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.urls import path, reverse
+from django.utils import timezone
+from django.utils.html import format_html, format_html_join
+from django.utils.safestring import mark_safe
+from .models import Participation, Participant, Activity, House_Cup_Year, House, Score, HouseStanding, ScoreEvent
+from . import export, rosters, standings, streaming
+from .importer import OPTIONAL_COLUMNS, REQUIRED_COLUMNS, import_season
+from .scoring import recompute_points, record_placements
+from .timing import query_budget
+
+@admin.register(House_Cup_Year)
+class HouseCupYearAdmin(admin.ModelAdmin):
+    list_display = ['__str__', 'export_links']
+    
+    def get_urls(self):
+        urls = [
+            path(
+                '<path:object_id>/import/',
+                self.admin_site.admin_view(self.import_view),
+                name='leaderboard_house_cup_year_import',
+            ),
+            path(
+                '<path:object_id>/export/<str:file_format>/',
+                self.admin_site.admin_view(self.export_view),
+                name='leaderboard_house_cup_year_export',
+            ),
+        ]
+        return urls + super().get_urls()
+    
+    def export_view(self, request, object_id, file_format):
+        """Stream every score and participation of a season as CSV or XLSX"""
+        house_cup_year = self.get_object(request, object_id)
+        if house_cup_year is None:
+            return self._get_obj_does_not_exist_redirect(request, self.opts, object_id)
+        if not self.has_view_permission(request, house_cup_year):
+            raise PermissionDenied
+        
+        if file_format == 'xlsx':
+            if export.openpyxl is None:
+                return HttpResponse("XLSX export needs openpyxl.", status=501)
+            response = FileResponse(
+                export.xlsx_file(house_cup_year),
+                as_attachment=True,
+                filename=export.filename(house_cup_year, 'xlsx'),
+            )
+            return streaming.stream(request, response, batch=streaming.FILE_BATCH)
+        if file_format != 'csv':
+            return HttpResponse(f"Unknown export format {file_format!r}.", status=404)
+        response = StreamingHttpResponse(export.stream_csv(house_cup_year), content_type='text/csv')
+        response['Content-Disposition'] = f'attachment; filename="{export.filename(house_cup_year, "csv")}"'
+        return streaming.stream(request, response)
+    
+    def import_view(self, request, object_id):
+        """Upload a CSV of activities, participations and rosters into a season"""
+        house_cup_year = self.get_object(request, object_id)
+        if house_cup_year is None:
+            return self._get_obj_does_not_exist_redirect(request, self.opts, object_id)
+        if not self.has_change_permission(request, house_cup_year):
+            raise PermissionDenied
+        
+        form = SeasonImportForm(request.POST or None, request.FILES or None)
+        if request.method == 'POST' and form.is_valid():
+            lines = io.TextIOWrapper(form.cleaned_data['file'].file, encoding='utf-8-sig', newline='')
+            try:
+                counts = import_season(house_cup_year, lines, dry_run=form.cleaned_data['dry_run'])
+            except ValidationError as error:
+                form.add_error(None, error)
+            except UnicodeDecodeError:
+                form.add_error('file', "The file must be UTF-8 encoded CSV.")
+            else:
+                summary = ', '.join(f"{name.replace('_', ' ')}: {count}" for name, count in counts.items())
+                if form.cleaned_data['dry_run']:
+                    self.message_user(request, f"Dry run, nothing saved. {summary}", messages.WARNING)
+                    return redirect(request.path)
+                self.message_user(request, f"Imported into {house_cup_year}. {summary}")
+                return redirect('admin:leaderboard_house_cup_year_changelist')
+        
+        context = {
+            **self.admin_site.each_context(request),
+            'title': f"Import: {house_cup_year}",
+            'opts': self.opts,
+            'original': house_cup_year,
+            'form': form,
+            'columns': ', '.join(REQUIRED_COLUMNS + OPTIONAL_COLUMNS),
+        }
+        return TemplateResponse(request, 'admin/leaderboard/house_cup_year/import.html', context)
+    
+    def export_links(self, obj):
+        return format_html(
+            '<a href="{}">CSV</a> / <a href="{}">XLSX</a> &middot; <a href="{}">Import</a>',
+            reverse('admin:leaderboard_house_cup_year_export', args=[obj.pk, 'csv']),
+            reverse('admin:leaderboard_house_cup_year_export', args=[obj.pk, 'xlsx']),
+            reverse('admin:leaderboard_house_cup_year_import', args=[obj.pk]),
+        )
+    export_links.short_description = "Results"
+
+class SeasonImportForm(forms.Form):
+    file = forms.FileField(help_text="CSV with one row per activity and house; a season export works.")
+    dry_run = forms.BooleanField(required=False, help_text="Check everything, then roll back.")
+
+@admin.register(House)
+class HouseAdmin(admin.ModelAdmin):
+    search_fields = ['name']
+
+@admin.register(Score)
+class ScoreAdmin(admin.ModelAdmin):
+    # Score.__str__ and the columns below read activity/house; join them instead of a query per row
+    list_display = ['activity', 'house', 'placement', 'points_earned', 'awarded_by', 'created_at']
+    list_filter = ['placement', 'activity__house_cup_year', 'house']
+    list_select_related = ['activity', 'house', 'awarded_by']
+    search_fields = ['activity__name', 'house__name']
+    autocomplete_fields = ['activity', 'house', 'participation', 'awarded_by']
+    date_hierarchy = 'created_at'  # served by the score_created index
+    show_full_result_count = False
+
+    # fixed however many rows there are: see list_select_related
+    @query_budget(8)
+    def changelist_view(self, request, extra_context=None):
+        return super().changelist_view(request, extra_context)
+
+@admin.register(HouseStanding)
+class HouseStandingAdmin(admin.ModelAdmin):
+    # Maintained from Score writes; rebuild with `manage.py rebuild_standings`
+    list_display = ['rank', 'house', 'house_cup_year', 'total_points', 'first_places', 'second_places', 'third_places']
+    list_filter = ['house_cup_year']
+    list_select_related = ['house', 'house_cup_year']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+
+@admin.register(ScoreEvent)
+class ScoreEventAdmin(admin.ModelAdmin):
+    # Append-only audit trail; written by the Score signals and record_placements
+    list_display = ['id', 'recorded_at', 'kind', 'activity', 'house', 'previous_points', 'points', 'placement', 'recorded_by']
+    list_filter = ['kind', 'house_cup_year', 'house']
+    list_select_related = ['activity', 'house', 'recorded_by']
+    search_fields = ['activity__name', '=score__id']
+    date_hierarchy = 'recorded_at'
+    show_full_result_count = False
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def has_delete_permission(self, request, obj=None):
+        return False
 
-admin.site.register(House_Cup_Year)
-admin.site.register(House)
-admin.site.register(Score)
+class PlacementForm(forms.Form):
+    """One placement dropdown per house registered for the activity"""
+    
+    def __init__(self, participations, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.participations = participations
+        for participation in participations:
+            self.fields[f'house_{participation.house_id}'] = forms.TypedChoiceField(
+                label=participation.house.name,
+                choices=[('', '— not placed —')] + Score.PLACEMENT,
+                coerce=int,
+                empty_value=None,
+                required=False,
+                help_text=participation.get_status_display(),
+            )
+    
+    def placements(self):
+        """house id -> placement for every house placed, None for one whose placement was cleared"""
+        placements = {}
+        for participation in self.participations:
+            field = f'house_{participation.house_id}'
+            if self.cleaned_data.get(field):
+                placements[participation.house_id] = self.cleaned_data[field]
+            elif self.initial.get(field):
+                placements[participation.house_id] = None
+        return placements
 
 @admin.register(Activity)
 class ActivityAdmin(admin.ModelAdmin):
-    list_display = ['name', 'activity_type', 'date', 'status', 'points_distribution_preview']
+    list_display = ['name', 'activity_type', 'date', 'status', 'points_distribution_preview', 'placements_link']
     list_filter = ['activity_type', 'status', 'house_cup_year']
+    search_fields = ['name']
+    date_hierarchy = 'date'  # served by the activity_date index
+    show_full_result_count = False
     actions = ['fix_points_distribution']
     
+    def get_urls(self):
+        urls = [
+            path(
+                '<path:object_id>/placements/',
+                self.admin_site.admin_view(self.placements_view),
+                name='leaderboard_activity_placements',
+            ),
+        ]
+        return urls + super().get_urls()
+    
+    def placements_view(self, request, object_id):
+        """Record every house's placement for one activity in a single transaction"""
+        activity = self.get_object(request, object_id)
+        if activity is None:
+            return self._get_obj_does_not_exist_redirect(request, self.opts, object_id)
+        if not self.has_change_permission(request, activity):
+            raise PermissionDenied
+        
+        participations = list(activity.participations.select_related('house').order_by('house__name'))
+        initial = {f'house_{s.house_id}': s.placement for s in activity.scores.all()}
+        form = PlacementForm(participations, request.POST or None, initial=initial)
+        
+        if request.method == 'POST' and form.is_valid():
+            try:
+                scores = record_placements(activity, form.placements(), awarded_by=request.user)
+            except ValidationError as error:
+                form.add_error(None, error)
+            else:
+                self.message_user(request, f"Saved {len(scores)} placements for {activity.name}.")
+                return redirect('admin:leaderboard_activity_changelist')
+        
+        context = {
+            **self.admin_site.each_context(request),
+            'title': f"Placements: {activity.name}",
+            'opts': self.opts,
+            'original': activity,
+            'form': form,
+        }
+        return TemplateResponse(request, 'admin/leaderboard/activity/placements.html', context)
+    
+    def placements_link(self, obj):
+        url = reverse('admin:leaderboard_activity_placements', args=[obj.pk])
+        return format_html('<a href="{}">Record placements</a>', url)
+    placements_link.short_description = "Placements"
+    
     def fix_points_distribution(self, request, queryset):
-        for activity in queryset:
-            activity.save()  # This will trigger the fixed save method
-        self.message_user(request, f"Fixed points distribution for {queryset.count()} activities.")
+        # complete every table and re-derive its scores in a fixed number of queries
+        activities = list(queryset)
+        incomplete = []
+        now = timezone.now()
+        for activity in activities:
+            table = {str(placement): points for placement, points in activity.points_table.items()}
+            if activity.points_distribution != table:
+                activity.points_distribution = table
+                # bulk_update skips auto_now
+                activity.updated_at = now
+                incomplete.append(activity)
+        with transaction.atomic():
+            Activity.objects.bulk_update(incomplete, ['points_distribution', 'updated_at'])
+            rescored = recompute_points(activities, recorded_by=request.user)
+            standings.bump_version({activity.house_cup_year_id for activity in incomplete})
+        self.message_user(
+            request, f"Fixed points distribution for {len(incomplete)} activities; recomputed {rescored} scores."
+        )
     fix_points_distribution.short_description = "Fix points distribution"
     
     def points_distribution_preview(self, obj):
@@ -31,20 +274,30 @@ class ParticipationAdminForm(forms.ModelForm):
         required=False,
         widget=forms.Textarea(attrs={
             'rows': 4,
-            'placeholder': 'Enter one participant per line:\nJohn Doe - Grade 10 (Captain)\nJane Smith - Grade 11\nBob Johnson - Grade 10'
+            'placeholder': 'Enter one participant per line:\nJohn Doe - Grade 10 - Section A (Captain) #2023-0001\nJane Smith - Grade 11\nBob Johnson - Grade 10'
         }),
-        help_text="Enter one participant per line. Add '(Captain)' to mark team captain."
+        help_text="Enter one participant per line. Add '(Captain)' to mark team captain, "
+                  "'Section X' for the section and '#ID' for the student ID."
     )
     
     class Meta:
         model = Participation
         fields = '__all__'
+    
+    def clean_participants_text(self):
+        """Parsed roster (list of dicts); every unreadable line is reported"""
+        return rosters.parse_participants(self.cleaned_data['participants_text'])
 
 @admin.register(Participation)
 class ParticipationAdmin(admin.ModelAdmin):
     form = ParticipationAdminForm
     list_display = ['activity', 'house', 'status', 'participant_count', 'team_captain', 'registered_at']
-    list_filter = ['status', 'activity', 'house']
+    # filtering on season/type instead of activity keeps the sidebar from loading every activity
+    list_filter = ['status', 'activity__house_cup_year', 'activity__activity_type', 'house']
+    search_fields = ['activity__name', 'house__name', 'team_name']
+    autocomplete_fields = ['activity', 'confirmed_by']
+    ordering = ['-registered_at', '-pk']
+    show_full_result_count = False
     readonly_fields = ['participant_list_display']
     
     fieldsets = (
@@ -60,41 +313,27 @@ class ParticipationAdmin(admin.ModelAdmin):
         }),
     )
     
+    @query_budget(7)
+    def changelist_view(self, request, extra_context=None):
+        return super().changelist_view(request, extra_context)
+
+    def get_queryset(self, request):
+        # __str__ and list_display read activity/house, also in Score's participation autocomplete;
+        # joined here because the changelist ignores list_select_related once select_related is set
+        return super().get_queryset(request).select_related('activity', 'house').annotate(
+            member_count=Count('members')
+        ).prefetch_related('members')
+    
     def save_model(self, request, obj, form, change):
-        # Process participants_text into JSON data
-        participants_text = form.cleaned_data.get('participants_text', '')
-        if participants_text:
-            obj.participants = self.parse_participants_text(participants_text)
-        
         super().save_model(request, obj, form, change)
-    
-    def parse_participants_text(self, text):
-        """Convert text input to structured JSON"""
-        participants = []
-        lines = [line.strip() for line in text.split('\n') if line.strip()]
-        
-        for line in lines:
-            participant = {'name': line}
-            
-            # Simple parsing logic
-            if '(Captain)' in line or '(captain)' in line:
-                participant['is_captain'] = True
-                participant['name'] = participant['name'].replace('(Captain)', '').replace('(captain)', '').strip()
-            
-            if 'Grade' in line:
-                # Extract grade: "John Doe - Grade 10" → grade 10
-                import re
-                grade_match = re.search(r'Grade\s*(\d+)', line)
-                if grade_match:
-                    participant['grade'] = grade_match.group(1)
-                    participant['name'] = re.sub(r'\s*-\s*Grade\s*\d+', '', participant['name']).strip()
-            
-            participants.append(participant)
         
-        return participants
+        # participants_text was parsed and validated by the form
+        participants = form.cleaned_data.get('participants_text')
+        if participants:
+            obj.set_participants(participants)
     
     def participant_count(self, obj):
-        return len(obj.participants)
+        return obj.participant_count
     participant_count.short_description = 'Members'
     
     def team_captain(self, obj):
@@ -103,15 +342,39 @@ class ParticipationAdmin(admin.ModelAdmin):
     team_captain.short_description = 'Captain'
     
     def participant_list_display(self, obj):
-        if not obj.participants:
+        participants = obj.participants if obj.pk else []
+        if not participants:
             return "No participants registered"
         
-        html = '<div class="participant-list">'
-        for participant in obj.participants:
-            captain_badge = ' <span style="color: #eab308;">👑</span>' if participant.get('is_captain') else ''
-            grade_info = f" <small>(Grade {participant.get('grade')})</small>" if participant.get('grade') else ''
-            html += f'<div style="padding: 4px 0; border-bottom: 1px solid #eee;">{participant["name"]}{grade_info}{captain_badge}</div>'
-        html += f'<div style="margin-top: 8px; font-weight: bold;">Total: {len(obj.participants)} participants</div>'
-        html += '</div>'
-        return format_html(html)
+        rows = format_html_join('', '<div style="padding: 4px 0; border-bottom: 1px solid #eee;">{}{}{}</div>', (
+            (
+                participant['name'],
+                format_html(" <small>({})</small>", self.participant_details(participant))
+                if self.participant_details(participant) else '',
+                mark_safe(' <span style="color: #eab308;">👑</span>') if participant.get('is_captain') else '',
+            )
+            for participant in participants
+        ))
+        return format_html(
+            '<div class="participant-list">{}<div style="margin-top: 8px; font-weight: bold;">Total: {} participants</div></div>',
+            rows, len(participants),
+        )
     participant_list_display.short_description = "Current Team Members"
+    
+    def participant_details(self, participant):
+        """'Grade 10, Section A, #2023-0001' - whichever are set"""
+        return ', '.join(filter(None, [
+            participant.get('grade') and f"Grade {participant['grade']}",
+            participant.get('section') and f"Section {participant['section']}",
+            participant.get('student_id') and f"#{participant['student_id']}",
+        ]))
+
+@admin.register(Participant)
+class ParticipantAdmin(admin.ModelAdmin):
+    # "which activities is student X in" - search uses the name index
+    list_display = ['name', 'grade', 'section', 'student_id', 'is_captain', 'participation']
+    list_filter = ['is_captain']
+    search_fields = ['name', '=student_id']
+    list_select_related = ['participation__activity', 'participation__house']
+    autocomplete_fields = ['participation']
+    show_full_result_count = False
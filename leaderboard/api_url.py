@@ -0,0 +1,12 @@
+from django.urls import path
+from . import api_views
+
+app_name = 'api'
+
+urlpatterns = [
+    path('standings', api_views.standings, name='standings'),
+    path('leaderboards', api_views.leaderboards, name='leaderboards'),
+    path('activities', api_views.activities, name='activities'),
+    path('simulation', api_views.simulation, name='simulation'),
+    path('activities/<int:pk>/scores', api_views.activity_scores, name='activity_scores'),
+]
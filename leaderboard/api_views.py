@@ -0,0 +1,170 @@
+import functools
+
+from django.core.cache import cache
+from django.db.models import Prefetch
+from django.http import Http404, HttpResponse, HttpResponseBadRequest, JsonResponse
+from django.utils.cache import get_conditional_response
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition, require_GET
+
+from . import ranking, simulator
+from .models import Activity, House_Cup_Year, Score
+from .serializers import serialize_activity, serialize_house_cup_year, serialize_score
+from .standings_cache import TIMEOUT, aget_standings
+
+API_VERSION = 'v1'
+
+
+def _seasons(request):
+    """?season=<id>, or the most recent House Cup Year"""
+    seasons = House_Cup_Year.objects.order_by('-year', '-season')
+    if 'season' in request.GET:
+        try:
+            seasons = seasons.filter(pk=int(request.GET['season']))
+        except ValueError:
+            raise Http404("Invalid season")
+    return seasons
+
+
+def _etag(house_cup_year_id, version):
+    return f'"{API_VERSION}-{house_cup_year_id}-{version}"'
+
+
+def season_etag(request, *args, **kwargs):
+    """Strong ETag from the season's version counter; one query, never touches Score"""
+    row = _seasons(request).values_list('pk', 'standings_version').first()
+    return _etag(*row) if row else None
+
+
+async def aseason_etag(request, *args, **kwargs):
+    row = await _seasons(request).values_list('pk', 'standings_version').afirst()
+    return _etag(*row) if row else None
+
+
+async def aactivity_etag(request, pk):
+    row = await Activity.objects.filter(pk=pk).values_list(
+        'house_cup_year_id', 'house_cup_year__standings_version'
+    ).afirst()
+    return _etag(*row) if row else None
+
+
+def acondition(etag_func):
+    """condition(etag_func=...) for async views; Django's calls etag_func synchronously"""
+    def decorator(view):
+        @functools.wraps(view)
+        async def inner(request, *args, **kwargs):
+            etag = await etag_func(request, *args, **kwargs)
+            response = get_conditional_response(request, etag=etag)
+            if response is None:
+                response = await view(request, *args, **kwargs)
+            if etag and request.method in ('GET', 'HEAD'):
+                response.headers.setdefault('ETag', etag)
+            return response
+        return inner
+    return decorator
+
+
+def _get_season(request):
+    house_cup_year = _seasons(request).first()
+    if house_cup_year is None:
+        raise Http404("No House Cup Year found")
+    return house_cup_year
+
+
+async def _aget_season(request):
+    house_cup_year = await _seasons(request).afirst()
+    if house_cup_year is None:
+        raise Http404("No House Cup Year found")
+    return house_cup_year
+
+
+@require_GET
+@cache_control(no_cache=True)
+@acondition(aseason_etag)
+async def standings(request):
+    house_cup_year = await _aget_season(request)
+    return JsonResponse({
+        'season': serialize_house_cup_year(house_cup_year),
+        'standings': await aget_standings(house_cup_year.pk),
+    })
+
+
+@require_GET
+@cache_control(no_cache=True)
+@condition(etag_func=season_etag)
+def leaderboards(request):
+    """Overall and per-category boards with ranks and tiebreak reasons"""
+    house_cup_year = _get_season(request)
+    return JsonResponse({
+        'season': serialize_house_cup_year(house_cup_year),
+        'leaderboards': {
+            board: [entry.as_dict() for entry in entries]
+            for board, entries in ranking.leaderboards(house_cup_year).items()
+        },
+    })
+
+
+@require_GET
+@cache_control(no_cache=True)
+@acondition(aseason_etag)
+async def activities(request):
+    house_cup_year = await _aget_season(request)
+    queryset = (
+        Activity.objects.filter(house_cup_year=house_cup_year)
+        .prefetch_related(Prefetch(
+            'scores',
+            queryset=Score.objects.select_related('house').order_by('placement'),
+            to_attr='results',
+        ))
+    )
+    if request.GET.get('status'):
+        queryset = queryset.filter(status=request.GET['status'])
+    if request.GET.get('type'):
+        queryset = queryset.filter(activity_type=request.GET['type'])
+    return JsonResponse({
+        'season': serialize_house_cup_year(house_cup_year),
+        'activities': [serialize_activity(activity, activity.results) async for activity in queryset],
+    })
+
+
+@require_GET
+@cache_control(no_cache=True)
+@acondition(aactivity_etag)
+async def activity_scores(request, pk):
+    try:
+        activity = await Activity.objects.aget(pk=pk)
+    except Activity.DoesNotExist:
+        raise Http404("Activity not found")
+    scores = (
+        activity.scores.select_related('house', 'participation')
+        .order_by('placement', 'house__name')
+    )
+    return JsonResponse({
+        'activity': serialize_activity(activity),
+        'scores': [serialize_score(score) async for score in scores],
+    })
+
+
+@require_GET
+@cache_control(no_cache=True)
+@condition(etag_func=season_etag)
+def simulation(request):
+    """What-if standings: clinch/elimination, finish bounds and win probabilities"""
+    if not simulator.available():
+        return HttpResponse("The standings simulator needs NumPy.", status=501)
+    house_cup_year = _get_season(request)
+    try:
+        samples = int(request.GET.get('samples', simulator.SAMPLES))
+        seed = int(request.GET.get('seed', 0))
+    except ValueError:
+        return HttpResponseBadRequest("samples and seed must be whole numbers")
+    if not 1 <= samples <= simulator.MAX_SAMPLES:
+        return HttpResponseBadRequest(f"samples must be between 1 and {simulator.MAX_SAMPLES}")
+
+    # same inputs, same answer: the seed is fixed and the version moves with every change
+    key = f'simulation:{house_cup_year.pk}:{house_cup_year.standings_version}:{samples}:{seed}'
+    result = cache.get(key)
+    if result is None:
+        result = simulator.simulate(house_cup_year, samples, seed)
+        cache.set(key, result, TIMEOUT)
+    return JsonResponse({'season': serialize_house_cup_year(house_cup_year), **result})
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class LeaderboardConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'leaderboard'
+
+    def ready(self):
+        from . import database, signals  # noqa: F401
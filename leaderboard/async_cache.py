@@ -0,0 +1,19 @@
+"""
+Cache reads from async views.
+
+Django's cache a* methods run the sync method in a worker thread unless the
+backend implements them itself. The in-process (locmem) cache is a dict
+lookup under a lock, so async views read it directly on the event loop.
+Every other backend goes through its aget(): a native one where the backend
+has it, otherwise a worker thread, since the file cache blocks on disk and
+the database cache's queries may not run on the loop.
+"""
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.core.cache.backends.locmem import LocMemCache
+
+
+async def get(key, default=None):
+    cache = caches[DEFAULT_CACHE_ALIAS]
+    if isinstance(cache, LocMemCache):
+        return cache.get(key, default)
+    return await cache.aget(key, default)
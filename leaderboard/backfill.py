@@ -0,0 +1,96 @@
+"""
+Batched, resumable backfills for data migrations.
+
+    def forwards(apps, schema_editor):
+        Activity = apps.get_model('leaderboard', 'Activity')
+        backfill.run('0042_activity_slug', Activity.objects.only('pk', 'name'), set_slug, ['slug'],
+                     using=schema_editor.connection.alias)
+
+run() walks the queryset in primary-key order, batch_size rows at a time
+(keyset pagination, so every chunk is an indexed range scan however far in
+it is), calls update(obj) on each row and writes the rows it changed with
+one bulk_update per chunk. Rows are streamed with .iterator(); at most one
+chunk is in memory.
+
+Each chunk commits in its own transaction together with a checkpoint (the
+last primary key done), a BackfillState row. If the migration
+is interrupted, running it again resumes after the last committed chunk.
+For that the migration must set `atomic = False`; inside an atomic
+migration the checkpoints roll back with everything else and a rerun
+simply starts over. The checkpoint is removed once the backfill finishes.
+
+Progress goes to the "leaderboard.backfill" logger.
+"""
+import logging
+import time
+
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from .models import BackfillState
+
+logger = logging.getLogger('leaderboard.backfill')
+
+BATCH_SIZE = 1000
+# seconds between progress lines
+PROGRESS_INTERVAL = 5
+
+
+def load_state(name, using=DEFAULT_DB_ALIAS):
+    """
+    (last primary key done, rows done, rows changed) of an unfinished
+    backfill, or None. The key is kept as text so any primary key type
+    (the activity table once had UUIDs) can be resumed from.
+    """
+    return BackfillState.objects.using(using).filter(name=name).values_list(
+        'last_pk', 'rows_done', 'rows_changed'
+    ).first()
+
+
+def _save_state(using, name, last_pk, rows_done, rows_changed):
+    state = {'last_pk': last_pk, 'rows_done': rows_done, 'rows_changed': rows_changed}
+    if not BackfillState.objects.using(using).filter(name=name).update(**state):
+        BackfillState.objects.using(using).create(name=name, **state)
+
+
+def run(name, queryset, update, fields, using=DEFAULT_DB_ALIAS, batch_size=BATCH_SIZE):
+    """
+    Apply `update(obj)` (returning True when it changed obj) to every row of
+    `queryset` and save `fields` of the changed rows. `name` identifies the
+    backfill's checkpoint; use the migration's name. Returns
+    {'rows': rows seen, 'changed': rows written}.
+    """
+    queryset = queryset.using(using).order_by('pk')
+    model = queryset.model
+    state = load_state(name, using)
+    last_pk, rows_done, rows_changed = state or (None, 0, 0)
+    if state:
+        logger.info("%s: resuming after pk %s (%d rows done)", name, last_pk, rows_done)
+
+    remaining = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+    total = rows_done + remaining.count()
+    reported = time.monotonic()
+    while True:
+        chunk = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+        with transaction.atomic(using=using):
+            changed = []
+            seen = 0
+            for obj in chunk[:batch_size].iterator(chunk_size=batch_size):
+                seen += 1
+                last_pk = obj.pk
+                if update(obj):
+                    changed.append(obj)
+            if not seen:
+                break
+            model._base_manager.using(using).bulk_update(changed, fields, batch_size=batch_size)
+            rows_done += seen
+            rows_changed += len(changed)
+            _save_state(using, name, str(last_pk), rows_done, rows_changed)
+
+        if time.monotonic() - reported >= PROGRESS_INTERVAL:
+            reported = time.monotonic()
+            logger.info("%s: %d/%d rows (%d changed)", name, rows_done, total, rows_changed)
+
+    BackfillState.objects.using(using).filter(name=name).delete()
+    if rows_done:
+        logger.info("%s: done, %d rows (%d changed)", name, rows_done, rows_changed)
+    return {'rows': rows_done, 'changed': rows_changed}
@@ -0,0 +1,159 @@
+"""
+Helpers for the benchmark management commands (bench_*).
+
+Benchmarks run against a throwaway test database so they never touch the
+real data, and seed it with synthetic seasons in bulk.
+"""
+import datetime
+import json
+import random
+import statistics
+import time
+from contextlib import contextmanager
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+
+from . import ledger, standings
+from .models import Activity, House, House_Cup_Year, Participant, Participation, Score
+
+HOUSE_NAMES = ['Red', 'Green', 'Blue', 'Yellow', 'Violet', 'Orange', 'Silver', 'Gold']
+# share of max_points per placement; None is the default 100/80/60/40/20%
+DISTRIBUTIONS = [
+    None,
+    (1.0, 0.6, 0.35, 0.15, 0.05),   # winner-heavy
+    (1.0, 0.9, 0.8, 0.7, 0.6),      # flat
+    (1.0, 0.5, 0.25, 0, 0),         # podium only
+]
+
+
+class BenchmarkCommand(BaseCommand):
+    """Base for the bench_* commands: adds `--json` and writes the results to it"""
+
+    def add_arguments(self, parser):
+        parser.add_argument('--json', dest='json_path', help="Write the results to this file.")
+
+    def write_json(self, options, results):
+        if options['json_path']:
+            with open(options['json_path'], 'w') as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(f"Wrote {options['json_path']}")
+
+
+@contextmanager
+def temporary_database(verbosity=0):
+    """Create a fresh test database for the duration of the block"""
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=verbosity, autoclobber=True)
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=verbosity)
+
+
+def seed(seasons=3, activities_per_season=60, houses=5, seed_value=0, batch_size=2000, members=0,
+         with_ledger=False):
+    """
+    Bulk-create seasons, activities (with a mix of points distributions),
+    participations, `members` roster entries per participation and scores;
+    returns row counts. Rows are written a batch of activities at a time, so
+    memory use does not grow with the size of the dataset. `with_ledger`
+    also appends the award events signals would have written.
+    """
+    rng = random.Random(seed_value)
+    house_rows = House.objects.bulk_create([
+        House(name=HOUSE_NAMES[i] if i < len(HOUSE_NAMES) else f'House {i + 1}', description='')
+        for i in range(houses)
+    ])
+    season_rows = House_Cup_Year.objects.bulk_create([
+        House_Cup_Year(year=datetime.date(2020 + i, 1, 1), season=i + 1) for i in range(seasons)
+    ])
+
+    counts = {
+        'houses': len(house_rows), 'seasons': len(season_rows),
+        'activities': 0, 'participations': 0, 'participants': 0, 'scores': 0,
+    }
+    activities_per_batch = max(1, batch_size // houses)
+    for season in season_rows:
+        start = timezone.make_aware(datetime.datetime(season.year.year, 6, 1))
+        for first in range(0, activities_per_season, activities_per_batch):
+            activities = []
+            for i in range(first, min(first + activities_per_batch, activities_per_season)):
+                max_points = rng.choice([50, 100, 150, 200])
+                activity = Activity(
+                    name=f'Activity {i + 1}',
+                    activity_type=rng.choice(Activity.ACTIVITY_TYPE)[0],
+                    house_cup_year=season,
+                    date=start + datetime.timedelta(hours=6 * i),
+                    location='Gym',
+                    organizer='SSG',
+                    max_points=max_points,
+                    status=rng.choice(['completed'] * 6 + ['scheduled', 'ongoing', 'draft', 'cancelled']),
+                )
+                shares = rng.choice(DISTRIBUTIONS)
+                if shares:
+                    activity.points_distribution = {
+                        placement: round(max_points * share) for placement, share in enumerate(shares, start=1)
+                    }
+                activity.points_distribution = activity.points_table.as_dict()
+                activities.append(activity)
+            Activity.objects.bulk_create(activities)
+
+            participations = Participation.objects.bulk_create([
+                Participation(activity=activity, house=house, status='participated')
+                for activity in activities
+                for house in house_rows
+            ])
+
+            participants = Participant.objects.bulk_create([
+                Participant(participation=participation, name=f'Student {participation.pk}-{i}',
+                            grade=str(7 + i % 6), is_captain=i == 0)
+                for participation in participations
+                for i in range(members)
+            ])
+
+            scores = []
+            for index, activity in enumerate(activities):
+                if activity.status != 'completed':
+                    continue
+                entrants = participations[index * houses:(index + 1) * houses]
+                placements = rng.sample(range(1, len(entrants) + 1), len(entrants))
+                for participation, placement in zip(entrants, placements):
+                    scores.append(Score(
+                        activity=activity,
+                        house=participation.house,
+                        participation=participation,
+                        placement=placement if placement <= 5 else None,
+                        points_earned=activity.points_table.points_for(placement),
+                    ))
+            Score.objects.bulk_create(scores)
+            if with_ledger:
+                ledger.append([
+                    event
+                    for score in scores
+                    for event in ledger.events_for_change(score, None, standings.Contribution(
+                        score.house.pk, season.pk, score.points_earned, score.placement,
+                    ))
+                ])
+
+            counts['activities'] += len(activities)
+            counts['participations'] += len(participations)
+            counts['participants'] += len(participants)
+            counts['scores'] += len(scores)
+    standings.rebuild()
+    return counts
+
+
+def measure(func, repeat=20):
+    """Run `func` `repeat` times; returns timing summary in milliseconds"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {
+        'median_ms': round(statistics.median(samples), 3),
+        'min_ms': round(min(samples), 3),
+        'max_ms': round(max(samples), 3),
+    }
@@ -0,0 +1,28 @@
+"""
+SQLite set up for many readers and a few concurrent scorekeepers.
+
+Every new SQLite connection runs settings.SQLITE_PRAGMAS. By default:
+
+  journal_mode=WAL      readers no longer wait for a writer, nor it for them
+  synchronous=NORMAL    with WAL, fsync at checkpoints instead of every commit;
+                        a power cut can lose the last commits, not corrupt the file
+  busy_timeout          a writer waits this long (ms) for the lock instead of
+                        failing with "database is locked"
+
+Transactions begin IMMEDIATE (DATABASES OPTIONS transaction_mode), so a
+writer takes the lock up front and busy_timeout applies; a deferred
+transaction that upgrades from read to write fails at once when another
+writer holds the lock.
+"""
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+
+@receiver(connection_created)
+def configure_sqlite(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    for name, value in getattr(settings, 'SQLITE_PRAGMAS', {}).items():
+        # the raw connection: nothing else has run on it yet
+        connection.connection.execute(f'PRAGMA {name} = {value}')
@@ -0,0 +1,126 @@
+"""
+Season results export (CSV / XLSX).
+
+Rows are streamed: participations and their scores come from one joined
+query read with .iterator(chunk_size), and each chunk's rosters are fetched
+with a single extra query, so memory stays flat however big the season is.
+"""
+import csv
+import tempfile
+from itertools import islice
+
+from .models import Participant, Participation
+from .rosters import format_participant
+
+try:
+    import openpyxl
+except ImportError:  # XLSX export is optional
+    openpyxl = None
+
+CHUNK_SIZE = 2000
+
+HEADERS = [
+    'season', 'activity_id', 'activity', 'activity_type', 'date', 'activity_status',
+    'location', 'organizer', 'max_points', 'house', 'team_name', 'participation_status', 'placement', 'points_earned',
+    'awarded_by', 'participant_count', 'captain', 'participants',
+]
+
+# one row per score, or one row for a participation without a score
+ROW_FIELDS = [
+    'pk', 'activity_id', 'activity__name', 'activity__activity_type', 'activity__date',
+    'activity__status', 'activity__location', 'activity__organizer', 'activity__max_points',
+    'house__name', 'team_name', 'status', 'scores__placement', 'scores__points_earned',
+    'scores__awarded_by__username',
+]
+
+
+def _rosters(participation_ids):
+    """participation id -> (captain, [formatted members]) in one query"""
+    rosters = {}
+    members = (
+        Participant.objects.filter(participation_id__in=participation_ids)
+        .order_by('participation_id', 'pk')
+        .values('participation_id', 'name', 'grade', 'section', 'student_id', 'is_captain')
+    )
+    for member in members:
+        roster = rosters.setdefault(member['participation_id'], [None, []])
+        # same form the admin roster box and the importer accept
+        roster[1].append(format_participant(member))
+        if member['is_captain']:
+            roster[0] = member['name']
+    return rosters
+
+
+def season_rows(house_cup_year, chunk_size=CHUNK_SIZE):
+    """Yield one list of HEADERS values per score/participation of a season"""
+    rows = (
+        Participation.objects.filter(activity__house_cup_year=house_cup_year)
+        .order_by('activity__date', 'activity_id', 'house__name', 'scores__pk')
+        .values_list(*ROW_FIELDS)
+        .iterator(chunk_size=chunk_size)
+    )
+    season = str(house_cup_year)
+    while chunk := list(islice(rows, chunk_size)):
+        rosters = _rosters({row[0] for row in chunk})
+        for (pk, activity_id, activity, activity_type, date, activity_status, location, organizer,
+             max_points, house, team_name, status, placement, points_earned, awarded_by) in chunk:
+            captain, members = rosters.get(pk, (None, []))
+            yield [
+                season, activity_id, activity, activity_type, date.isoformat(), activity_status,
+                location, organizer, max_points, house, team_name, status, placement, points_earned,
+                awarded_by or '', len(members), captain or '', '; '.join(members),
+            ]
+
+
+class Echo:
+    """File-like object whose write() hands the line back to csv.writer"""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(house_cup_year, chunk_size=CHUNK_SIZE):
+    """Yield the season export as CSV text, one line at a time"""
+    writer = csv.writer(Echo())
+    yield writer.writerow(HEADERS)
+    for row in season_rows(house_cup_year, chunk_size):
+        yield writer.writerow(row)
+
+
+def write_csv(house_cup_year, file, chunk_size=CHUNK_SIZE):
+    """Write the season export to an open text file; returns the number of data rows"""
+    writer = csv.writer(file)
+    writer.writerow(HEADERS)
+    count = 0
+    for count, row in enumerate(season_rows(house_cup_year, chunk_size), start=1):
+        writer.writerow(row)
+    return count
+
+
+def write_xlsx(house_cup_year, file, chunk_size=CHUNK_SIZE):
+    """
+    Write the season export as XLSX to a binary file; returns the number of
+    data rows. Needs openpyxl; its write-only mode keeps rows on disk.
+    """
+    if openpyxl is None:
+        raise RuntimeError("XLSX export needs openpyxl (pip install openpyxl)")
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet(title=f"Season {house_cup_year.season}")
+    sheet.append(HEADERS)
+    count = 0
+    for count, row in enumerate(season_rows(house_cup_year, chunk_size), start=1):
+        sheet.append(row)
+    workbook.save(file)
+    return count
+
+
+def xlsx_file(house_cup_year, chunk_size=CHUNK_SIZE):
+    """The season export as XLSX in a temporary file, rewound for reading"""
+    file = tempfile.TemporaryFile()
+    write_xlsx(house_cup_year, file, chunk_size)
+    file.seek(0)
+    return file
+
+
+def filename(house_cup_year, extension):
+    return f"house-cup-{house_cup_year.year.year}-season-{house_cup_year.season}.{extension}"
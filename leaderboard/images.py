@@ -0,0 +1,104 @@
+"""
+Responsive image variants.
+
+`manage.py build_images` resizes every static image under imgs/ to a few
+widths, encodes each as AVIF and WebP into RESPONSIVE_IMAGES_DIR (served as
+static/responsive/...) and writes a manifest that the
+{% responsive_image %} tag reads to emit srcsets. Pillow is only needed to
+build; pages fall back to the original images until the variants exist.
+"""
+import functools
+import json
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles.finders import get_finders
+
+SOURCE_PREFIX = 'imgs/'
+SOURCE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+# static prefix of RESPONSIVE_IMAGES_DIR in STATICFILES_DIRS
+STATIC_PREFIX = 'responsive'
+WIDTHS = (96, 192, 320, 640, 960, 1280, 1920)
+# encoder options, in order of preference; the slowest effort settings
+# (webp method 6, avif speed < 8) take 4-20x longer for a few % smaller files
+FORMATS = {
+    'avif': {'quality': 50, 'speed': 8},
+    'webp': {'quality': 75, 'method': 4},
+}
+MIME_TYPES = {'avif': 'image/avif', 'webp': 'image/webp'}
+
+
+def manifest_path(output_dir=None):
+    return Path(output_dir or settings.RESPONSIVE_IMAGES_DIR) / 'manifest.json'
+
+
+@functools.lru_cache(maxsize=4)
+def _read_manifest(path, mtime_ns):
+    with open(path) as f:
+        return json.load(f)
+
+
+def load_manifest():
+    """static name -> {'width', 'height', 'variants': {format: [[width, static name], ...]}}"""
+    path = manifest_path()
+    try:
+        mtime_ns = path.stat().st_mtime_ns
+    except FileNotFoundError:
+        return {}
+    # keyed on mtime so a rebuild is picked up without a restart
+    return _read_manifest(str(path), mtime_ns)
+
+
+def source_images():
+    """Yield (static name, file path) of every image under imgs/ in the static dirs"""
+    seen = set()
+    for finder in get_finders():
+        for name, storage in finder.list([]):
+            name = name.replace('\\', '/')
+            if name in seen or not name.startswith(SOURCE_PREFIX) or not name.lower().endswith(SOURCE_EXTENSIONS):
+                continue
+            seen.add(name)
+            yield name, Path(storage.path(name))
+
+
+def target_widths(width, widths=WIDTHS):
+    """The widths to build for an image `width` pixels wide; never upscales"""
+    return sorted({w for w in widths if w < width} | {min(width, max(widths))})
+
+
+def build(output_dir=None, widths=WIDTHS, formats=None, force=False, log=None):
+    """
+    Write the variants and their manifest; returns the manifest. Variants
+    newer than their source are kept unless `force`.
+    """
+    from PIL import Image, ImageOps, features
+
+    output_dir = Path(output_dir or settings.RESPONSIVE_IMAGES_DIR)
+    if formats is None:
+        formats = [fmt for fmt in FORMATS if features.check(fmt)]
+    manifest = {}
+    for name, path in source_images():
+        source_mtime = path.stat().st_mtime
+        with Image.open(path) as image:
+            image = ImageOps.exif_transpose(image)
+            width, height = image.size
+            entry = manifest[name] = {'width': width, 'height': height, 'variants': {fmt: [] for fmt in formats}}
+            stem = name.rsplit('.', 1)[0]
+            for target in target_widths(width, widths):
+                resized = None
+                for fmt in formats:
+                    variant = f'{stem}-{target}.{fmt}'
+                    destination = output_dir / variant
+                    if force or not destination.exists() or destination.stat().st_mtime < source_mtime:
+                        if resized is None:
+                            resized = image.resize((target, max(1, round(height * target / width))), Image.LANCZOS)
+                        destination.parent.mkdir(parents=True, exist_ok=True)
+                        resized.save(destination, fmt.upper(), **FORMATS[fmt])
+                        if log:
+                            log(f"{variant} ({destination.stat().st_size // 1024} KB)")
+                    entry['variants'][fmt].append([target, f'{STATIC_PREFIX}/{variant}'])
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    with open(manifest_path(output_dir), 'w') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    return manifest
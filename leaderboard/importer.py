@@ -0,0 +1,247 @@
+"""
+Bulk season import from CSV.
+
+Each row is one (activity, house) entry: the activity's details, the
+house's participation and its roster. The whole file is read and validated
+in one streaming pass; nothing is written unless every row is valid. Writes
+are a handful of bulk queries in a single transaction, so a 10k-row file
+takes seconds. The season export (leaderboard.export) is valid input.
+"""
+import csv
+import datetime
+from dataclasses import dataclass, field
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from . import rosters, standings
+from .models import Activity, House, Participant, Participation
+
+REQUIRED_COLUMNS = ['activity', 'activity_type', 'date', 'house']
+OPTIONAL_COLUMNS = [
+    'activity_status', 'location', 'organizer', 'max_points',
+    'team_name', 'participation_status', 'participants',
+]
+ACTIVITY_TYPES = dict(Activity.ACTIVITY_TYPE)
+ACTIVITY_STATUSES = dict(Activity.ACTIVITY_STATUS)
+PARTICIPATION_STATUSES = dict(Participation.PARTICIPATION_STATUS)
+MAX_ERRORS = 50
+
+
+@dataclass
+class ImportPlan:
+    """Validated rows, keyed the way they are written"""
+    # (name, date) -> Activity field values
+    activities: dict = field(default_factory=dict)
+    # (activity key, house id) -> Participation field values
+    participations: dict = field(default_factory=dict)
+    # (activity key, house id) -> list of participant dicts, for rows with a roster column
+    rosters: dict = field(default_factory=dict)
+    rows: int = 0
+
+
+def parse_when(value):
+    """ISO date or datetime -> aware datetime, or None"""
+    value = value.strip()
+    when = parse_datetime(value)
+    if when is None:
+        day = parse_date(value)
+        if day is None:
+            return None
+        when = datetime.datetime.combine(day, datetime.time())
+    if timezone.is_naive(when):
+        when = timezone.make_aware(when)
+    return when
+
+
+def field_errors(model, values):
+    """Messages from the model fields' own validators (max_length, ...) for `values`"""
+    messages = []
+    for name, value in values.items():
+        try:
+            model._meta.get_field(name).run_validators(value)
+        except ValidationError as invalid:
+            messages += [f"{name} {message[0].lower()}{message[1:]}" for message in invalid.messages]
+    return messages
+
+
+def plan_import(lines):
+    """
+    Parse and validate CSV `lines` (any iterable of text lines) in one pass.
+    Returns an ImportPlan; raises ValidationError listing every bad row.
+    """
+    reader = csv.DictReader(lines)
+    columns = set(reader.fieldnames or [])
+    missing = [column for column in REQUIRED_COLUMNS if column not in columns]
+    if missing:
+        raise ValidationError(f"Missing column(s): {', '.join(missing)}")
+    has_rosters = 'participants' in columns
+
+    houses = {name.casefold(): pk for pk, name in House.objects.values_list('pk', 'name')}
+    plan, errors = ImportPlan(), []
+
+    def error(message):
+        errors.append(f"Line {reader.line_num}: {message}")
+
+    for row in reader:
+        plan.rows += 1
+        if len(errors) >= MAX_ERRORS:
+            continue
+
+        name = (row['activity'] or '').strip()
+        when = parse_when(row['date'] or '')
+        house_id = houses.get((row['house'] or '').strip().casefold())
+        if not name:
+            error("activity name is empty")
+        if when is None:
+            error(f"{row['date']!r} is not a date")
+        if house_id is None:
+            error(f"unknown house {row['house']!r}")
+        if not name or when is None or house_id is None:
+            continue
+
+        activity = {
+            'activity_type': (row['activity_type'] or '').strip(),
+            'status': (row.get('activity_status') or 'draft').strip(),
+            'location': (row.get('location') or '').strip(),
+            'organizer': (row.get('organizer') or '').strip(),
+            'max_points': (row.get('max_points') or '100').strip(),
+        }
+        if activity['activity_type'] not in ACTIVITY_TYPES:
+            error(f"unknown activity type {activity['activity_type']!r}")
+            continue
+        if activity['status'] not in ACTIVITY_STATUSES:
+            error(f"unknown activity status {activity['status']!r}")
+            continue
+        try:
+            activity['max_points'] = int(activity['max_points'])
+            if activity['max_points'] < 1:
+                raise ValueError
+        except ValueError:
+            error(f"max_points must be a positive whole number, not {activity['max_points']!r}")
+            continue
+        # too long for its column: rejected here, not by the database (or not at all on SQLite)
+        invalid = field_errors(Activity, {
+            'name': name, 'location': activity['location'], 'organizer': activity['organizer'],
+        })
+        if invalid:
+            for message in invalid:
+                error(message)
+            continue
+
+        activity_key = (name, when)
+        known = plan.activities.setdefault(activity_key, activity)
+        if known != activity:
+            changed = [column for column, value in activity.items() if known[column] != value]
+            error(f"{name} differs from its earlier rows in {', '.join(changed)}")
+            continue
+
+        key = (activity_key, house_id)
+        if key in plan.participations:
+            error(f"{row['house']} is listed twice for {name}")
+            continue
+        status = (row.get('participation_status') or 'registered').strip()
+        if status not in PARTICIPATION_STATUSES:
+            error(f"unknown participation status {status!r}")
+            continue
+        team_name = (row.get('team_name') or '').strip()
+        invalid = field_errors(Participation, {'team_name': team_name})
+        if invalid:
+            for message in invalid:
+                error(message)
+            continue
+        plan.participations[key] = {'status': status, 'team_name': team_name}
+
+        if has_rosters:
+            try:
+                plan.rosters[key] = rosters.parse_participants(row['participants'], label='entry')
+            except ValidationError as invalid:
+                for message in invalid.messages:
+                    error(f"{row['house']} roster for {name}, {message}")
+
+    if errors:
+        if len(errors) >= MAX_ERRORS:
+            errors.append("Too many errors; stopped checking.")
+        raise ValidationError(errors)
+    return plan
+
+
+def apply_plan(house_cup_year, plan):
+    """
+    Write a validated plan into `house_cup_year` in bulk; returns counts.
+
+    Activities are matched on (name, date) and existing ones are left as
+    they are. Participations are upserted on (activity, house). Rosters
+    given in the file replace the existing ones.
+    """
+    with transaction.atomic():
+        existing = {
+            (activity.name, activity.date): activity
+            for activity in Activity.objects.filter(
+                house_cup_year=house_cup_year,
+                name__in={name for name, _ in plan.activities},
+            ).only('pk', 'name', 'date')
+        }
+        new_activities = []
+        for (name, when), values in plan.activities.items():
+            if (name, when) in existing:
+                continue
+            activity = Activity(name=name, date=when, house_cup_year=house_cup_year, **values)
+            # bulk_create skips Activity.save(); store the distribution it would have
+            activity.points_distribution = activity.points_table.as_dict()
+            new_activities.append(activity)
+            existing[(name, when)] = activity
+        Activity.objects.bulk_create(new_activities)
+
+        Participation.objects.bulk_create(
+            [
+                Participation(activity=existing[activity_key], house_id=house_id, **values)
+                for (activity_key, house_id), values in plan.participations.items()
+            ],
+            update_conflicts=True,
+            unique_fields=['activity', 'house'],
+            update_fields=['status', 'team_name'],
+        )
+
+        members = []
+        if plan.rosters:
+            participation_ids = {
+                (activity_id, house_id): pk
+                for pk, activity_id, house_id in Participation.objects.filter(
+                    activity__house_cup_year=house_cup_year
+                ).values_list('pk', 'activity_id', 'house_id')
+            }
+            roster_ids = []
+            for (activity_key, house_id), roster in plan.rosters.items():
+                participation_id = participation_ids[(existing[activity_key].pk, house_id)]
+                roster_ids.append(participation_id)
+                members += [Participant.from_dict(p, participation_id=participation_id) for p in roster]
+            Participant.objects.filter(participation_id__in=roster_ids).delete()
+            Participant.objects.bulk_create(members)
+
+        # bulk writes skip the Activity signals
+        standings.bump_version([house_cup_year.pk])
+        standings.notify_changed([house_cup_year.pk])
+
+    return {
+        'rows': plan.rows,
+        'activities_created': len(new_activities),
+        'activities_matched': len(plan.activities) - len(new_activities),
+        'participations': len(plan.participations),
+        'participants': len(members),
+    }
+
+
+def import_season(house_cup_year, lines, dry_run=False):
+    """
+    Validate and import CSV `lines` into `house_cup_year`; returns counts.
+    With `dry_run`, everything is written and then rolled back.
+    """
+    plan = plan_import(lines)
+    with transaction.atomic():
+        counts = apply_plan(house_cup_year, plan)
+        if dry_run:
+            transaction.set_rollback(True)
+    return counts
@@ -0,0 +1,188 @@
+"""
+Append-only score ledger and point-in-time standings.
+
+Every change to a score's contribution is appended as a ScoreEvent
+(award, revise, revoke) in the same transaction as the Score write. Every
+CHECKPOINT_INTERVAL events a season's totals are stored as a
+StandingsCheckpoint, so standings at any earlier moment are rebuilt from
+the nearest checkpoint plus a short tail of events.
+"""
+from django.conf import settings
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import House, HouseStanding, ScoreEvent, StandingsCheckpoint
+from .standings import MEDAL_FIELDS, TOTAL_FIELDS, Contribution, assign_ranks
+
+EVENT_FIELDS = ['house_id', 'points', 'placement', 'previous_points', 'previous_placement']
+
+
+def checkpoint_interval():
+    return getattr(settings, 'LEDGER_CHECKPOINT_INTERVAL', 200)
+
+
+def events_for_change(score, old, new, recorded_by=None, recorded_at=None):
+    """
+    Unsaved ScoreEvents moving `score` from contribution `old` to `new`
+    (standings.Contribution, either may be None). Moving a score to
+    another house or season is a revoke followed by an award.
+    """
+    if old == new:
+        return []
+    if old and new and (old.house_id, old.house_cup_year_id) != (new.house_id, new.house_cup_year_id):
+        return (
+            events_for_change(score, old, None, recorded_by, recorded_at)
+            + events_for_change(score, None, new, recorded_by, recorded_at)
+        )
+
+    current = new or old
+    event = ScoreEvent(
+        kind=ScoreEvent.REVISE if old and new else ScoreEvent.AWARD if new else ScoreEvent.REVOKE,
+        score_id=score.pk,
+        activity_id=score.activity_id,
+        house_id=current.house_id,
+        house_cup_year_id=current.house_cup_year_id,
+        points=new.points if new else 0,
+        placement=new.placement if new else None,
+        previous_points=old.points if old else 0,
+        previous_placement=old.placement if old else None,
+    )
+    if recorded_by is not None:
+        event.recorded_by = recorded_by
+    elif new:
+        event.recorded_by_id = score.awarded_by_id
+    if recorded_at is not None:
+        event.recorded_at = recorded_at
+    return [event]
+
+
+def last_contribution(score):
+    """The contribution of `score` according to its latest event, or None"""
+    event = ScoreEvent.objects.filter(score_id=score.pk).order_by('-pk').first()
+    if event is None or event.kind == ScoreEvent.REVOKE:
+        return None
+    return Contribution(event.house_id, event.house_cup_year_id, event.points, event.placement)
+
+
+def append(events):
+    """Write events in one INSERT and checkpoint any season that is due"""
+    if not events:
+        return []
+    ScoreEvent.objects.bulk_create(events)
+    maybe_checkpoint({event.house_cup_year_id for event in events})
+    return events
+
+
+def maybe_checkpoint(house_cup_year_ids):
+    """Checkpoint seasons with at least checkpoint_interval() events since their last checkpoint"""
+    latest = StandingsCheckpoint.objects.filter(
+        house_cup_year_id=OuterRef('house_cup_year_id')
+    ).order_by('-event').values('event')[:1]
+    pending = (
+        ScoreEvent.objects.filter(house_cup_year_id__in=house_cup_year_ids)
+        .filter(pk__gt=Coalesce(Subquery(latest), 0))
+        .values('house_cup_year_id')
+        .annotate(count=Count('id'), last=Max('id'))
+        .order_by()
+    )
+    checkpoints = []
+    for row in pending:
+        if row['count'] >= checkpoint_interval():
+            totals, event_id = replay(row['house_cup_year_id'], row['last'])
+            checkpoints.append(StandingsCheckpoint(
+                house_cup_year_id=row['house_cup_year_id'], event_id=event_id, totals=totals,
+            ))
+    StandingsCheckpoint.objects.bulk_create(checkpoints)
+    return checkpoints
+
+
+def apply(totals, event):
+    """Add one event (a ScoreEvent or a dict of EVENT_FIELDS) to `totals` in place"""
+    if not isinstance(event, dict):
+        event = {field: getattr(event, field) for field in EVENT_FIELDS}
+    row = totals.setdefault(str(event['house_id']), [0] * len(TOTAL_FIELDS))
+    row[0] += event['points'] - event['previous_points']
+    medals = list(MEDAL_FIELDS)
+    if event['previous_placement'] in MEDAL_FIELDS:
+        row[1 + medals.index(event['previous_placement'])] -= 1
+    if event['placement'] in MEDAL_FIELDS:
+        row[1 + medals.index(event['placement'])] += 1
+    return totals
+
+
+def replay(house_cup_year_id, until_event_id=None):
+    """
+    Season totals after event `until_event_id` (or the latest event), from
+    the nearest checkpoint at or before it. Returns (totals, last event id).
+    """
+    checkpoints = StandingsCheckpoint.objects.filter(house_cup_year_id=house_cup_year_id)
+    tail = ScoreEvent.objects.filter(house_cup_year_id=house_cup_year_id)
+    if until_event_id is not None:
+        checkpoints = checkpoints.filter(event_id__lte=until_event_id)
+        tail = tail.filter(pk__lte=until_event_id)
+    checkpoint = checkpoints.order_by('-event').only('event', 'totals').first()
+
+    totals, last_event_id = {}, 0
+    if checkpoint:
+        totals = {house_id: list(row) for house_id, row in checkpoint.totals.items()}
+        last_event_id = checkpoint.event_id
+        tail = tail.filter(pk__gt=checkpoint.event_id)
+    for event in tail.order_by('pk').values('pk', *EVENT_FIELDS).iterator():
+        apply(totals, event)
+        last_event_id = event['pk']
+    return totals, last_event_id
+
+
+def as_standings(house_cup_year_id, totals, houses=None):
+    """Unsaved, ranked HouseStanding rows for replayed `totals`"""
+    if houses is None:
+        houses = House.objects.in_bulk([int(house_id) for house_id in totals])
+    rows = [
+        HouseStanding(
+            house=houses[int(house_id)],
+            house_cup_year_id=house_cup_year_id,
+            **dict(zip(TOTAL_FIELDS, values)),
+        )
+        for house_id, values in totals.items()
+        if int(house_id) in houses
+    ]
+    return assign_ranks(rows)
+
+
+def standings_as_of(house_cup_year_id, at=None, after_event=None, after_activity=None):
+    """
+    Ranked standings of a season at a point in its history: at time `at`,
+    after ledger event `after_event`, or right after the last change to
+    activity `after_activity` was recorded. With none given, the latest.
+    """
+    events = ScoreEvent.objects.filter(house_cup_year_id=house_cup_year_id)
+    if at is not None:
+        after_event = events.filter(recorded_at__lte=at).aggregate(last=Max('id'))['last'] or 0
+    elif after_activity is not None:
+        activity_id = getattr(after_activity, 'pk', after_activity)
+        after_event = events.filter(activity_id=activity_id).aggregate(last=Max('id'))['last'] or 0
+    totals, _ = replay(house_cup_year_id, after_event)
+    return as_standings(house_cup_year_id, totals)
+
+
+def race(house_cup_year_id):
+    """
+    Standings after each activity in the order they were scored, for
+    animating the season: a list of (activity id, ranked standings).
+    Replays the season's ledger once.
+    """
+    totals, frames, activity_id = {}, [], None
+    events = (
+        ScoreEvent.objects.filter(house_cup_year_id=house_cup_year_id)
+        .order_by('pk').values('activity_id', *EVENT_FIELDS)
+    )
+    for event in events.iterator():
+        if activity_id is not None and event['activity_id'] != activity_id:
+            frames.append((activity_id, {house_id: list(row) for house_id, row in totals.items()}))
+        activity_id = event['activity_id']
+        apply(totals, event)
+    if activity_id is not None:
+        frames.append((activity_id, totals))
+
+    houses = House.objects.in_bulk()
+    return [(activity_id, as_standings(house_cup_year_id, frame, houses)) for activity_id, frame in frames]
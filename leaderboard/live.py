@@ -0,0 +1,164 @@
+"""
+In-process fan-out of standings changes to Server-Sent Events clients.
+
+Each score change is read from the database once, turned into a delta and
+pushed to every connected client of this worker. The broker lives in the
+worker process, so run the live endpoint on the same worker(s) that save
+scores (or run a single ASGI worker for the live stream).
+"""
+import asyncio
+import itertools
+import json
+import threading
+from collections import deque
+
+from asgiref.sync import sync_to_async
+
+from . import standings_cache
+
+HEARTBEAT_SECONDS = 15
+RETRY_MILLISECONDS = 3000
+HISTORY_SIZE = 256
+QUEUE_SIZE = 64
+
+
+def read_snapshot(house_cup_year_id):
+    """Current standings of one season, keyed by house id"""
+    return {row['house_id']: row for row in standings_cache.read_standings(house_cup_year_id)}
+
+
+def format_event(event_id, event, data):
+    """Encode one SSE message"""
+    return f"id: {event_id}\nevent: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+class Subscriber:
+    def __init__(self, house_cup_year_id):
+        self.house_cup_year_id = house_cup_year_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        self.overflowed = False
+
+    def deliver(self, event):
+        # Runs on the subscriber's event loop
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Too slow to keep up; the client reconnects with Last-Event-ID
+            self.overflowed = True
+
+
+class StandingsBroker:
+    """Keeps the latest standings per season and fans deltas out to subscribers"""
+
+    def __init__(self, history_size=HISTORY_SIZE):
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._last_id = 0
+        self._history = deque(maxlen=history_size)
+        self._snapshots = {}
+        self._snapshot_locks = {}
+        # held while a season is read and its snapshot replaced (see publish)
+        self._season_locks = {}
+        self._subscribers = set()
+
+    @property
+    def subscriber_count(self):
+        return len(self._subscribers)
+
+    def _season_lock(self, house_cup_year_id):
+        with self._lock:
+            return self._season_locks.setdefault(house_cup_year_id, threading.Lock())
+
+    def publish(self, house_cup_year_id):
+        """Read one season's standings and push the delta to every subscriber (thread-safe)"""
+        # Reads of one season take turns: one that started earlier could see older rows,
+        # and storing those last would roll every client back until the next change
+        with self._season_lock(house_cup_year_id):
+            current = read_snapshot(house_cup_year_id)
+            with self._lock:
+                previous = self._snapshots.get(house_cup_year_id, {})
+                self._snapshots[house_cup_year_id] = current
+                changed = [row for house_id, row in current.items() if previous.get(house_id) != row]
+                removed = [house_id for house_id in previous if house_id not in current]
+                if not changed and not removed:
+                    return None
+                self._last_id = next(self._ids)
+                event = (self._last_id, house_cup_year_id, {
+                    'season': house_cup_year_id,
+                    'changed': changed,
+                    'removed': removed,
+                })
+                self._history.append(event)
+                subscribers = [s for s in self._subscribers if s.house_cup_year_id == house_cup_year_id]
+
+            # still under the season lock, so subscribers get the deltas in order
+            for subscriber in subscribers:
+                try:
+                    subscriber.loop.call_soon_threadsafe(subscriber.deliver, event)
+                except RuntimeError:
+                    # Event loop already closed
+                    with self._lock:
+                        self._subscribers.discard(subscriber)
+        return event[0]
+
+    def _subscribe(self, subscriber, last_event_id):
+        """Register a subscriber; returns (missed events, snapshot or None)"""
+        with self._lock:
+            self._subscribers.add(subscriber)
+            season = subscriber.house_cup_year_id
+            oldest = self._history[0][0] if self._history else self._last_id + 1
+            if last_event_id is not None and oldest - 1 <= last_event_id <= self._last_id:
+                missed = [e for e in self._history if e[0] > last_event_id and e[1] == season]
+                return missed, None
+            return [], (self._last_id, self._snapshots.get(season))
+
+    async def _load_snapshot(self, house_cup_year_id):
+        # One database read even when thousands of clients connect at once
+        lock = self._snapshot_locks.setdefault(house_cup_year_id, asyncio.Lock())
+        async with lock:
+            rows = self._snapshots.get(house_cup_year_id)
+            if rows is None:
+                rows = await sync_to_async(self._read_first_snapshot)(house_cup_year_id)
+        return rows
+
+    def _read_first_snapshot(self, house_cup_year_id):
+        # in turn with publish(), which may store a newer snapshot meanwhile
+        with self._season_lock(house_cup_year_id):
+            rows = self._snapshots.get(house_cup_year_id)
+            if rows is None:
+                rows = read_snapshot(house_cup_year_id)
+                with self._lock:
+                    self._snapshots[house_cup_year_id] = rows
+        return rows
+
+    async def stream(self, house_cup_year_id, last_event_id=None, heartbeat=HEARTBEAT_SECONDS):
+        """Async generator of SSE messages for one season"""
+        subscriber = Subscriber(house_cup_year_id)
+        missed, snapshot = self._subscribe(subscriber, last_event_id)
+        try:
+            yield f"retry: {RETRY_MILLISECONDS}\n\n"
+            if snapshot is not None:
+                snapshot_id, rows = snapshot
+                if rows is None:
+                    rows = await self._load_snapshot(house_cup_year_id)
+                yield format_event(snapshot_id, 'snapshot', {
+                    'season': house_cup_year_id,
+                    'standings': list(rows.values()),
+                })
+            for event_id, _, data in missed:
+                yield format_event(event_id, 'standings', data)
+
+            while not subscriber.overflowed:
+                try:
+                    event_id, _, data = await asyncio.wait_for(subscriber.queue.get(), heartbeat)
+                except asyncio.TimeoutError:
+                    yield ": heartbeat\n\n"
+                    continue
+                yield format_event(event_id, 'standings', data)
+        finally:
+            with self._lock:
+                self._subscribers.discard(subscriber)
+
+
+broker = StandingsBroker()
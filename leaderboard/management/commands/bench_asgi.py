@@ -0,0 +1,245 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import socket
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management.base import CommandError
+from django.db import connection, connections
+from django.db.models import Prefetch
+from django.http import Http404, JsonResponse
+from django.urls import clear_url_caches, include, path
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition, require_GET
+
+from leaderboard.api_views import _etag, _get_season, season_etag
+from leaderboard.bench import BenchmarkCommand, seed, temporary_database
+from leaderboard.models import Activity, Score
+from leaderboard.page_cache import cached_render
+from leaderboard.serializers import serialize_activity, serialize_house_cup_year, serialize_score
+from leaderboard.standings import current_house_cup_year
+from leaderboard.standings_cache import get_standings, get_version
+
+try:
+    import uvicorn
+except ImportError:  # only the ASGI deployment needs it
+    uvicorn = None
+
+HOST = '127.0.0.1'
+
+
+# The sync views the async ones replaced: under ASGI each request runs in a worker thread
+def landing_page(request):
+    house_cup_year = current_house_cup_year()
+    version = f'{house_cup_year.pk}.{get_version(house_cup_year.pk)}' if house_cup_year else None
+    return cached_render(request, "landing.html", lambda: {
+        'house_cup_year': house_cup_year,
+        'standings': get_standings(house_cup_year.pk) if house_cup_year else [],
+    }, version=version)
+
+
+@require_GET
+@cache_control(no_cache=True)
+@condition(etag_func=season_etag)
+def activities(request):
+    house_cup_year = _get_season(request)
+    queryset = Activity.objects.filter(house_cup_year=house_cup_year).prefetch_related(Prefetch(
+        'scores', queryset=Score.objects.select_related('house').order_by('placement'), to_attr='results',
+    ))
+    return JsonResponse({
+        'season': serialize_house_cup_year(house_cup_year),
+        'activities': [serialize_activity(activity, activity.results) for activity in queryset],
+    })
+
+
+def activity_etag(request, pk):
+    row = Activity.objects.filter(pk=pk).values_list(
+        'house_cup_year_id', 'house_cup_year__standings_version'
+    ).first()
+    return _etag(*row) if row else None
+
+
+@require_GET
+@cache_control(no_cache=True)
+@condition(etag_func=activity_etag)
+def activity_scores(request, pk):
+    activity = Activity.objects.filter(pk=pk).first()
+    if activity is None:
+        raise Http404("Activity not found")
+    scores = activity.scores.select_related('house', 'participation').order_by('placement', 'house__name')
+    return JsonResponse({
+        'activity': serialize_activity(activity),
+        'scores': [serialize_score(score) for score in scores],
+    })
+
+
+# the server's ROOT_URLCONF: the site as deployed plus the sync views under /sync/
+urlpatterns = [
+    path('sync/', landing_page),
+    path('sync/activities', activities),
+    path('sync/activities/<int:pk>/scores', activity_scores),
+    path('', include('aclcxp.urls')),
+]
+
+VARIANTS = {
+    'sync': ['/sync/', '/sync/activities', '/sync/activities/{pk}/scores'],
+    'async': ['/', '/api/v1/activities', '/api/v1/activities/{pk}/scores'],
+}
+
+
+def serve(port):
+    """The uvicorn worker, in its own process"""
+    from django.core.asgi import get_asgi_application
+
+    settings.ROOT_URLCONF = __name__
+    # as deployed: no per-query log kept, no timing line per request
+    settings.DEBUG = False
+    clear_url_caches()
+    logging.getLogger('leaderboard.requests').setLevel(logging.WARNING)
+    config = uvicorn.Config(
+        get_asgi_application(), host=HOST, port=port, lifespan='off', log_level='warning', access_log=False,
+    )
+    uvicorn.Server(config).run()
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind((HOST, 0))
+        return sock.getsockname()[1]
+
+
+def wait_for(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection((HOST, port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise CommandError("uvicorn did not start")
+
+
+async def fetch(reader, writer, path):
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: {HOST}\r\n\r\n".encode())
+    head = await reader.readuntil(b'\r\n\r\n')
+    status = int(head.split(b' ', 2)[1])
+    length = 0
+    for line in head.split(b'\r\n'):
+        if line.lower().startswith(b'content-length:'):
+            length = int(line.split(b':', 1)[1])
+    await reader.readexactly(length)
+    return status
+
+
+async def client(port, paths, offset, deadline, latencies, stats):
+    """One keep-alive connection sending requests back to back"""
+    reader = writer = None
+    index = offset
+    while time.monotonic() < deadline:
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection(HOST, port)
+            start = time.perf_counter()
+            status = await fetch(reader, writer, paths[index % len(paths)])
+            index += 1
+        except (OSError, asyncio.IncompleteReadError, ValueError):
+            stats['errors'] += 1
+            if writer is not None:
+                writer.close()
+            reader = writer = None
+            continue
+        if status == 200:
+            latencies.append(time.perf_counter() - start)
+        else:
+            stats['errors'] += 1
+    if writer is not None:
+        writer.close()
+
+
+async def load(port, paths, clients, duration):
+    """(latencies, errors, seconds until the last response)"""
+    latencies, stats = [], {'errors': 0}
+    start = time.monotonic()
+    await asyncio.gather(*[
+        client(port, paths, i, start + duration, latencies, stats) for i in range(clients)
+    ])
+    return latencies, stats['errors'], time.monotonic() - start
+
+
+def percentile(samples, fraction):
+    if not samples:
+        return None
+    return round(sorted(samples)[min(len(samples) - 1, int(len(samples) * fraction))] * 1000, 1)
+
+
+def run(variant, activity_id, clients, duration, warmup):
+    paths = [p.format(pk=activity_id) for p in VARIANTS[variant]]
+    port = free_port()
+    # the server opens its own connections
+    connections.close_all()
+    server = multiprocessing.get_context('fork').Process(target=serve, args=(port,), daemon=True)
+    server.start()
+    try:
+        wait_for(port)
+        # fills the page and standings caches and starts the worker's threads
+        asyncio.run(load(port, paths, clients, warmup))
+        latencies, errors, seconds = asyncio.run(load(port, paths, clients, duration))
+    finally:
+        server.terminate()
+        server.join()
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'seconds': round(seconds, 1),
+        'requests_per_second': round(len(latencies) / seconds, 1),
+        'p50_ms': percentile(latencies, 0.5),
+        'p99_ms': percentile(latencies, 0.99),
+    }
+
+
+class Command(BenchmarkCommand):
+    help = (
+        "Serve the public leaderboard, activity list and activity detail with uvicorn and compare "
+        "requests/s and latency of the sync views with their async replacements under many clients"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=500, help="Concurrent keep-alive connections.")
+        parser.add_argument('--duration', type=float, default=15, help="Seconds measured per variant.")
+        parser.add_argument('--warmup', type=float, default=3)
+        parser.add_argument('--activities', type=int, default=60)
+        parser.add_argument('--variant', action='append', choices=list(VARIANTS), help="Repeatable; defaults to both.")
+        super().add_arguments(parser)
+
+    def handle(self, *args, **options):
+        if uvicorn is None:
+            raise CommandError("bench_asgi needs uvicorn (pip install uvicorn).")
+        if connection.vendor != 'sqlite':
+            raise CommandError("bench_asgi seeds a temporary SQLite file; run it with ACLCXP_DB=sqlite.")
+
+        database = connection.settings_dict
+        results = {}
+        # the server process needs a database file; the default test database is in memory
+        with tempfile.TemporaryDirectory() as directory:
+            database['TEST'] = {**database.get('TEST', {}), 'NAME': os.path.join(directory, 'bench.sqlite3')}
+            with temporary_database():
+                counts = seed(1, options['activities'], 5)
+                activity_id = Activity.objects.filter(scores__isnull=False).values_list('pk', flat=True).first()
+                self.stdout.write(f"Seeded {counts}")
+                for variant in options['variant'] or VARIANTS:
+                    results[variant] = result = run(
+                        variant, activity_id, options['clients'], options['duration'], options['warmup'],
+                    )
+                    self.stdout.write(
+                        f"{variant:>6}: {result['requests_per_second']:>8} requests/s, "
+                        f"p50 {result['p50_ms']} ms, p99 {result['p99_ms']} ms, {result['errors']} errors"
+                    )
+
+        self.write_json(options, {
+            **{key: options[key] for key in ['clients', 'duration', 'activities']},
+            'dataset': counts,
+            'results': results,
+        })
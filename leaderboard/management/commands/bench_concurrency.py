@@ -0,0 +1,168 @@
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+
+from django.conf import settings
+from django.db import OperationalError, connection, connections
+from django.test.utils import override_settings
+
+from leaderboard import standings
+from leaderboard.bench import BenchmarkCommand, seed, temporary_database
+from leaderboard.models import House_Cup_Year, Participation, Score
+
+# SQLite before leaderboard.database: rollback journal, deferred transactions
+SQLITE_MODES = {
+    'rollback journal': {'pragmas': {'journal_mode': 'DELETE', 'synchronous': 'FULL'}, 'transaction_mode': None},
+    'wal': {'pragmas': settings.SQLITE_PRAGMAS or {'journal_mode': 'WAL'}, 'transaction_mode': 'IMMEDIATE'},
+}
+
+
+def percentile(samples, fraction):
+    if not samples:
+        return None
+    return round(sorted(samples)[min(len(samples) - 1, int(len(samples) * fraction))] * 1000, 2)
+
+
+def writer(entries, writes, seed_value, reconnect, results):
+    """Create `writes` scores, as a scorekeeper saving one placement at a time"""
+    rng = random.Random(seed_value)
+    latencies, errors = [], 0
+    for _ in range(writes):
+        participation = rng.choice(entries)
+        start = time.perf_counter()
+        try:
+            Score.objects.create(
+                activity_id=participation.activity_id, house_id=participation.house_id,
+                participation=participation, placement=rng.randint(1, 5),
+            )
+        except OperationalError:
+            errors += 1
+        else:
+            latencies.append(time.perf_counter() - start)
+        if reconnect:
+            connection.close()
+    results.put(('write', latencies, errors))
+
+
+def reader(house_cup_year_id, stop, reconnect, results):
+    """Aggregate a season's standings until the writers are done"""
+    latencies, errors = [], 0
+    while not stop.is_set():
+        start = time.perf_counter()
+        try:
+            standings.aggregate_standings([house_cup_year_id])
+        except OperationalError:
+            errors += 1
+        else:
+            latencies.append(time.perf_counter() - start)
+        if reconnect:
+            connection.close()
+    results.put(('read', latencies, errors))
+
+
+def run(writers, readers, writes, activities, reconnect):
+    """
+    Writers and readers are forked processes, like web server workers;
+    threads would mostly measure contention for the GIL.
+    """
+    seed(1, activities, 5)
+    house_cup_year_id = House_Cup_Year.objects.get().pk
+    entries = list(Participation.objects.all())
+    # children must open their own connections
+    connections.close_all()
+
+    context = multiprocessing.get_context('fork')
+    stop, results = context.Event(), context.Queue()
+    write_processes = [
+        context.Process(target=writer, args=(entries, writes, i, reconnect, results)) for i in range(writers)
+    ]
+    read_processes = [context.Process(target=reader, args=(house_cup_year_id, stop, reconnect, results)) for _ in range(readers)]
+
+    start = time.perf_counter()
+    for process in read_processes + write_processes:
+        process.start()
+    stats = {'write': ([], 0), 'read': ([], 0)}
+    for _ in write_processes:
+        kind, latencies, errors = results.get()
+        stats[kind] = (stats[kind][0] + latencies, stats[kind][1] + errors)
+    elapsed = time.perf_counter() - start
+    stop.set()
+    for _ in read_processes:
+        kind, latencies, errors = results.get()
+        stats[kind] = (stats[kind][0] + latencies, stats[kind][1] + errors)
+    for process in read_processes + write_processes:
+        process.join()
+
+    (write_latency, write_errors), (read_latency, read_errors) = stats['write'], stats['read']
+    return {
+        'seconds': round(elapsed, 2),
+        'writes_per_second': round(len(write_latency) / elapsed, 1),
+        'reads_per_second': round(len(read_latency) / elapsed, 1),
+        'write_errors': write_errors,
+        'read_errors': read_errors,
+        'write_p50_ms': percentile(write_latency, 0.5),
+        'write_p95_ms': percentile(write_latency, 0.95),
+        'read_p50_ms': percentile(read_latency, 0.5),
+        'read_p95_ms': percentile(read_latency, 0.95),
+    }
+
+
+class Command(BenchmarkCommand):
+    help = (
+        "Writer processes create scores while reader processes aggregate standings; compares SQLite's "
+        "rollback journal with WAL, or measures the configured PostgreSQL"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=4)
+        parser.add_argument('--readers', type=int, default=16)
+        parser.add_argument('--writes', type=int, default=100, help="Scores created per writer.")
+        parser.add_argument('--activities', type=int, default=100)
+        parser.add_argument(
+            '--mode', action='append', choices=list(SQLITE_MODES),
+            help="SQLite mode to run (repeatable). Defaults to both.",
+        )
+        parser.add_argument(
+            '--reconnect', action='store_true',
+            help="Open a new connection for every operation, as CONN_MAX_AGE = 0 does per request.",
+        )
+        super().add_arguments(parser)
+
+    def handle(self, *args, **options):
+        args = (options['writers'], options['readers'], options['writes'], options['activities'], options['reconnect'])
+        results = {}
+        if connection.vendor == 'sqlite':
+            database = connection.settings_dict
+            options_before = dict(database['OPTIONS'])
+            try:
+                for mode in options['mode'] or SQLITE_MODES:
+                    config = SQLITE_MODES[mode]
+                    database['OPTIONS'] = {**options_before, 'transaction_mode': config['transaction_mode']}
+                    # other processes need a database file; the default test database is in memory
+                    with tempfile.TemporaryDirectory() as directory, \
+                            override_settings(SQLITE_PRAGMAS=config['pragmas']):
+                        database['TEST'] = {**database.get('TEST', {}), 'NAME': os.path.join(directory, 'bench.sqlite3')}
+                        with temporary_database():
+                            results[mode] = run(*args)
+            finally:
+                database['OPTIONS'] = options_before
+        else:
+            database = connection.settings_dict
+            reuse = 'pool' if 'pool' in database['OPTIONS'] else f"CONN_MAX_AGE={database['CONN_MAX_AGE']}"
+            mode = f'{connection.vendor} ({reuse})'
+            with temporary_database():
+                results[mode] = run(*args)
+        connections.close_all()
+
+        for mode, result in results.items():
+            self.stdout.write(
+                f"{mode:>20}: {result['writes_per_second']:>7} writes/s ({result['write_errors']} errors, "
+                f"p95 {result['write_p95_ms']} ms), {result['reads_per_second']:>7} reads/s "
+                f"({result['read_errors']} errors, p95 {result['read_p95_ms']} ms)"
+            )
+        self.write_json(options, {
+            **{key: options[key] for key in ['writers', 'readers', 'writes', 'activities', 'reconnect']},
+            'results': results,
+        })
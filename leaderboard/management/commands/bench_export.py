@@ -0,0 +1,70 @@
+import os
+import time
+import tracemalloc
+
+from django.db.models import Prefetch
+
+from leaderboard import export
+from leaderboard.bench import BenchmarkCommand, seed, temporary_database
+from leaderboard.models import House_Cup_Year, Score
+
+
+def streaming_export(house_cup_year, chunk_size):
+    with open(os.devnull, 'w', newline='') as file:
+        return export.write_csv(house_cup_year, file, chunk_size)
+
+
+def materialized_export(house_cup_year, chunk_size):
+    """What an admin-style export does: load every score and roster first"""
+    scores = list(
+        Score.objects.filter(activity__house_cup_year=house_cup_year)
+        .select_related('activity', 'house', 'participation')
+        .prefetch_related(Prefetch('participation__members'))
+    )
+    return len(scores)
+
+
+def run(func, house_cup_year, chunk_size, trace):
+    if trace:
+        tracemalloc.start()
+    start = time.perf_counter()
+    rows = func(house_cup_year, chunk_size)
+    seconds = time.perf_counter() - start
+    result = {'rows': rows, 'seconds': round(seconds, 2), 'rows_per_second': round(rows / seconds)}
+    if trace:
+        result['peak_mb'] = round(tracemalloc.get_traced_memory()[1] / 2 ** 20, 1)
+        tracemalloc.stop()
+    return result
+
+
+class Command(BenchmarkCommand):
+    help = "Seed one large season and measure time and peak memory of the streaming season export"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scores', type=int, default=1_000_000, help="Approximate score rows to seed.")
+        parser.add_argument('--houses', type=int, default=8)
+        parser.add_argument('--members', type=int, default=2, help="Roster size per participation.")
+        parser.add_argument('--chunk-size', type=int, default=export.CHUNK_SIZE)
+        parser.add_argument('--baseline', action='store_true', help="Also measure loading everything into memory.")
+        super().add_arguments(parser)
+
+    def handle(self, *args, **options):
+        # about 60% of seeded activities are completed and get scores
+        activities = max(1, round(options['scores'] / options['houses'] / 0.6))
+        with temporary_database():
+            counts = seed(1, activities, options['houses'], members=options['members'])
+            self.stdout.write(f"Seeded {counts}")
+            house_cup_year = House_Cup_Year.objects.get()
+
+            results = {'dataset': counts}
+            # timings without tracemalloc overhead, then peak memory with it
+            results['streaming'] = run(streaming_export, house_cup_year, options['chunk_size'], False)
+            results['streaming']['peak_mb'] = run(
+                streaming_export, house_cup_year, options['chunk_size'], True)['peak_mb']
+            if options['baseline']:
+                results['materialized'] = run(materialized_export, house_cup_year, options['chunk_size'], True)
+
+        for name, result in results.items():
+            if name != 'dataset':
+                self.stdout.write(f"{name:>12}: {result}")
+        self.write_json(options, results)
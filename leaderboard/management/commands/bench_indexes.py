@@ -0,0 +1,80 @@
+from django.db import connection
+
+from leaderboard import standings
+from leaderboard.bench import BenchmarkCommand, measure, seed, temporary_database
+from leaderboard.models import Activity, House, House_Cup_Year, Score
+
+# Indexes added for the leaderboard access patterns (migration 0013)
+BENCHMARKED_INDEXES = {
+    Activity: ['activity_season_status_date', 'activity_type_date', 'activity_date'],
+    Score: ['score_activity_house', 'score_house_created', 'score_created'],
+}
+
+
+def access_patterns():
+    """name -> queryset factory, mirroring the views and admin changelists"""
+    season = House_Cup_Year.objects.order_by('-year').first()
+    house = House.objects.first()
+    activity = Activity.objects.filter(house_cup_year=season, status='completed').first()
+    return {
+        'activity changelist': lambda: Activity.objects.order_by('-date')[:100],
+        'season activities by status': lambda: Activity.objects.filter(
+            house_cup_year=season, status='completed').order_by('-date'),
+        'activities by type': lambda: Activity.objects.filter(activity_type='sports').order_by('-date')[:100],
+        'score for activity and house': lambda: Score.objects.filter(activity=activity, house=house),
+        'house score history': lambda: Score.objects.filter(house=house).order_by('-created_at')[:50],
+        'score changelist': lambda: Score.objects.order_by('-created_at')[:100],
+        'season aggregate': lambda: Score.objects.filter(
+            activity__house_cup_year=season).values('house').order_by(),
+    }
+
+
+class Command(BenchmarkCommand):
+    help = "Seed a multi-season dataset and compare query plans/timings without and with the leaderboard indexes"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seasons', type=int, default=5)
+        parser.add_argument('--activities', type=int, default=400, help="Activities per season.")
+        parser.add_argument('--houses', type=int, default=5)
+        parser.add_argument('--repeat', type=int, default=50)
+        super().add_arguments(parser)
+
+    def handle(self, *args, **options):
+        with temporary_database():
+            counts = seed(options['seasons'], options['activities'], options['houses'])
+            self.stdout.write(f"Seeded {counts}")
+            patterns = access_patterns()
+
+            self.set_indexes(enabled=False)
+            before = self.run_patterns(patterns, options['repeat'])
+            self.set_indexes(enabled=True)
+            after = self.run_patterns(patterns, options['repeat'])
+            # also exercise the aggregate the standings rebuild uses
+            after['standings rebuild'] = {'plan': '', **measure(standings.rebuild, 3)}
+
+        results = {'dataset': counts, 'before': before, 'after': after}
+        for name in before:
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            self.stdout.write(f"  before {before[name]['median_ms']:>9.3f} ms  {before[name]['plan']}")
+            self.stdout.write(f"  after  {after[name]['median_ms']:>9.3f} ms  {after[name]['plan']}")
+        self.write_json(options, results)
+
+    def set_indexes(self, enabled):
+        with connection.schema_editor() as editor:
+            for model, names in BENCHMARKED_INDEXES.items():
+                for index in model._meta.indexes:
+                    if index.name in names:
+                        if enabled:
+                            editor.add_index(model, index)
+                        else:
+                            editor.remove_index(model, index)
+        with connection.cursor() as cursor:
+            if connection.vendor in ('sqlite', 'postgresql'):
+                cursor.execute('ANALYZE')
+
+    def run_patterns(self, patterns, repeat):
+        results = {}
+        for name, queryset in patterns.items():
+            plan = ' | '.join(line.strip() for line in queryset().explain().splitlines())
+            results[name] = {'plan': plan, **measure(lambda: list(queryset()), repeat)}
+        return results
@@ -0,0 +1,48 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from leaderboard import ranking
+from leaderboard.bench import BenchmarkCommand, measure, seed, temporary_database
+from leaderboard.models import House_Cup_Year, Score
+from leaderboard.standings import aggregate_standings
+
+
+def per_category(house_cup_year):
+    """The obvious alternative: one aggregate per board"""
+    boards = {ranking.OVERALL: aggregate_standings([house_cup_year.pk])}
+    for category in ranking.CATEGORIES:
+        rows = (
+            Score.objects.filter(activity__house_cup_year=house_cup_year, activity__activity_type=category)
+            .order_by()
+            .values('house_id')
+            .annotate(**ranking.board_columns([]))
+        )
+        boards[category] = list(rows)
+    return boards
+
+
+class Command(BenchmarkCommand):
+    help = "Seed one season and compare the single-query leaderboards with one query per category"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--activities', type=int, default=200)
+        parser.add_argument('--houses', type=int, default=5)
+        parser.add_argument('--repeat', type=int, default=50)
+        super().add_arguments(parser)
+
+    def handle(self, *args, **options):
+        with temporary_database():
+            counts = seed(1, options['activities'], options['houses'])
+            self.stdout.write(f"Seeded {counts}")
+            house_cup_year = House_Cup_Year.objects.get()
+
+            results = {'dataset': counts}
+            for name, func in [('single query', ranking.leaderboards), ('per category', per_category)]:
+                with CaptureQueriesContext(connection) as queries:
+                    func(house_cup_year)
+                results[name] = {'queries': len(queries), **measure(lambda: func(house_cup_year), options['repeat'])}
+
+        for name, result in results.items():
+            if name != 'dataset':
+                self.stdout.write(f"{name:>13}: {result['queries']} queries, {result['median_ms']:.3f} ms median")
+        self.write_json(options, results)
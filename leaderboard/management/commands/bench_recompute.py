@@ -0,0 +1,83 @@
+from django.db import connection, transaction
+
+from leaderboard.bench import BenchmarkCommand, measure, seed, temporary_database
+from leaderboard.models import Activity, Score
+from leaderboard.scoring import recompute_points
+
+
+class Rollback(Exception):
+    pass
+
+
+def rescaled(activities, factor=1.5):
+    """New points tables for every activity, as an organizer's edit would make"""
+    for activity in activities:
+        activity.points_distribution = {
+            placement: round(points * factor) for placement, points in activity.points_table.items()
+        }
+        activity.__dict__.pop('points_table', None)
+    return activities
+
+
+def set_based(activities):
+    recompute_points(activities)
+
+
+def per_score(activities):
+    """The obvious alternative: re-save every score of every activity"""
+    for activity in activities:
+        Activity.objects.filter(pk=activity.pk).update(points_distribution=activity.points_distribution)
+        for score in Score.objects.filter(activity=activity, placement__isnull=False):
+            score.activity = activity
+            score.save()
+
+
+def run(func, activities, repeat):
+    """Round trips and timings of `func`, each run rolled back so every run starts alike"""
+    round_trips = 0
+
+    def count(execute, sql, params, many, context):
+        nonlocal round_trips
+        round_trips += 1
+        return execute(sql, params, many, context)
+
+    def once():
+        try:
+            with transaction.atomic():
+                func(rescaled(activities))
+                raise Rollback
+        except Rollback:
+            pass
+
+    with connection.execute_wrapper(count):
+        once()
+    return {'queries': round_trips, **measure(once, repeat)}
+
+
+class Command(BenchmarkCommand):
+    help = "Seed seasons of growing size and time re-scoring every activity after a points table change"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--activities', type=int, action='append', help="Season size (repeatable).")
+        parser.add_argument('--houses', type=int, default=5)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--baseline', action='store_true', help="Also time re-saving every score (slow).")
+        super().add_arguments(parser)
+
+    def handle(self, *args, **options):
+        methods = {'set based': set_based}
+        if options['baseline']:
+            methods['per score'] = per_score
+
+        results = {}
+        for size in options['activities'] or [50, 200, 800]:
+            with temporary_database():
+                results[size] = {'dataset': seed(1, size, options['houses'])}
+                activities = list(Activity.objects.all())
+                for name, func in methods.items():
+                    results[size][name] = result = run(func, activities, options['repeat'])
+                    self.stdout.write(
+                        f"{size:>5} activities, {name:>9}: {result['queries']:>5} queries, "
+                        f"{result['median_ms']:9.1f} ms median"
+                    )
+        self.write_json(options, results)
@@ -0,0 +1,81 @@
+import random
+
+from leaderboard import rosters
+from leaderboard.bench import BenchmarkCommand, measure
+
+FIRST_NAMES = ['John', 'Jane', 'Bob', 'Mary-Jane', 'Juan', 'Ana', 'Lee', 'Maria Clara']
+LAST_NAMES = ['Doe', 'Smith', 'Johnson', 'Dela Cruz', 'Santos', 'Reyes', 'Lim']
+
+
+def legacy_parse_participants_text(text):
+    """ParticipationAdmin.parse_participants_text before leaderboard.rosters, kept for comparison"""
+    participants = []
+    lines = [line.strip() for line in text.split('\n') if line.strip()]
+
+    for line in lines:
+        participant = {'name': line}
+
+        # Simple parsing logic
+        if '(Captain)' in line or '(captain)' in line:
+            participant['is_captain'] = True
+            participant['name'] = participant['name'].replace('(Captain)', '').replace('(captain)', '').strip()
+
+        if 'Grade' in line:
+            # Extract grade: "John Doe - Grade 10" → grade 10
+            import re
+            grade_match = re.search(r'Grade\s*(\d+)', line)
+            if grade_match:
+                participant['grade'] = grade_match.group(1)
+                participant['name'] = re.sub(r'\s*-\s*Grade\s*\d+', '', participant['name']).strip()
+
+        participants.append(participant)
+
+    return participants
+
+
+def synthetic_roster(lines, seed_value=0):
+    """Roster lines in the legacy form ("Name - Grade N (Captain)") both parsers read alike"""
+    rng = random.Random(seed_value)
+    result = []
+    for i in range(lines):
+        line = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+        if rng.random() < 0.9:
+            line += f" - Grade {rng.randint(7, 12)}"
+        if i % 10 == 0:
+            line += " (Captain)"
+        result.append(line)
+    return '\n'.join(result)
+
+
+def parse_batch(text):
+    """The new parser over many teams' rosters, streaming with iter_roster"""
+    return [line.participant for line in rosters.iter_roster(text.split('\n')) if not line.error]
+
+
+class Command(BenchmarkCommand):
+    help = "Compare the precompiled roster parser with the old admin parser on a large pasted roster"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lines', type=int, default=100_000)
+        parser.add_argument('--repeat', type=int, default=5)
+        super().add_arguments(parser)
+
+    def handle(self, *args, **options):
+        text = synthetic_roster(options['lines'])
+        # one team can only have one captain, so compare on per-line results
+        legacy = legacy_parse_participants_text(text)
+        parsed = [rosters.parse_participant(line) for line in text.split('\n')]
+        if parsed != legacy:
+            mismatches = sum(1 for a, b in zip(parsed, legacy) if a != b)
+            self.stderr.write(f"{mismatches} line(s) parse differently")
+
+        results = {
+            'lines': options['lines'],
+            'legacy': measure(lambda: legacy_parse_participants_text(text), options['repeat']),
+            'precompiled': measure(lambda: parse_batch(text), options['repeat']),
+        }
+        results['speedup'] = round(results['legacy']['median_ms'] / results['precompiled']['median_ms'], 2)
+        for name in ['legacy', 'precompiled']:
+            self.stdout.write(f"{name:>12}: {results[name]['median_ms']:>9.1f} ms median")
+        self.stdout.write(f"     speedup: {results['speedup']}x")
+        self.write_json(options, results)
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from leaderboard import images
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate responsive AVIF/WebP variants of the static images for {% responsive_image %}. "
+        "Run before collectstatic; needs Pillow."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', help="Directory to write to. Defaults to RESPONSIVE_IMAGES_DIR.")
+        parser.add_argument('--widths', type=int, nargs='+', default=list(images.WIDTHS))
+        parser.add_argument('--format', dest='formats', action='append', choices=list(images.FORMATS),
+                            help="Encode only this format (repeatable). Defaults to every format Pillow supports.")
+        parser.add_argument('--force', action='store_true', help="Re-encode variants that are up to date.")
+
+    def handle(self, *args, **options):
+        try:
+            import PIL  # noqa: F401
+        except ImportError:
+            raise CommandError("build_images needs Pillow (pip install Pillow)")
+
+        log = self.stdout.write if options['verbosity'] > 1 else None
+        manifest = images.build(options['output'], options['widths'], options['formats'], options['force'], log)
+        variants = sum(len(sizes) for entry in manifest.values() for sizes in entry['variants'].values())
+        formats = sorted({fmt for entry in manifest.values() for fmt in entry['variants']})
+        self.stdout.write(f"{len(manifest)} image(s), {variants} variant(s) ({', '.join(formats) or 'none'})")
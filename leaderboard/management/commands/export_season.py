@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from leaderboard import export
+from leaderboard.models import House_Cup_Year
+from leaderboard.standings import current_house_cup_year
+
+
+class Command(BaseCommand):
+    help = "Export every score and participation (with rosters) of a House Cup Year as CSV or XLSX"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--season', type=int, help="House Cup Year id. Defaults to the most recent one.")
+        parser.add_argument('--format', choices=['csv', 'xlsx'], default='csv', dest='file_format')
+        parser.add_argument('--output', '-o', help="File to write. CSV defaults to stdout.")
+        parser.add_argument('--chunk-size', type=int, default=export.CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        if options['season']:
+            house_cup_year = House_Cup_Year.objects.filter(pk=options['season']).first()
+        else:
+            house_cup_year = current_house_cup_year()
+        if house_cup_year is None:
+            raise CommandError("No such House Cup Year")
+
+        output = options['output']
+        if options['file_format'] == 'xlsx':
+            if export.openpyxl is None:
+                raise CommandError("XLSX export needs openpyxl (pip install openpyxl)")
+            if not output:
+                raise CommandError("XLSX export needs --output")
+            with open(output, 'wb') as file:
+                count = export.write_xlsx(house_cup_year, file, options['chunk_size'])
+        elif output:
+            with open(output, 'w', newline='', encoding='utf-8') as file:
+                count = export.write_csv(house_cup_year, file, options['chunk_size'])
+        else:
+            count = export.write_csv(house_cup_year, self.stdout, options['chunk_size'])
+
+        # keep stdout clean when it carries the CSV
+        self.stderr.write(f"Exported {count} row(s) of {house_cup_year}")
@@ -0,0 +1,54 @@
+import datetime
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from leaderboard.importer import import_season
+from leaderboard.models import House_Cup_Year
+
+
+class Command(BaseCommand):
+    help = "Import activities, participations and rosters of a House Cup Year from CSV"
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_path')
+        season = parser.add_mutually_exclusive_group(required=True)
+        season.add_argument('--season', type=int, help="Existing House Cup Year id.")
+        season.add_argument(
+            '--year', type=datetime.date.fromisoformat,
+            help="Year (YYYY-MM-DD) of the House Cup Year to import into, created if needed; see --number.",
+        )
+        parser.add_argument('--number', type=int, default=1, help="Season number used with --year.")
+        parser.add_argument('--dry-run', action='store_true', help="Validate and roll back instead of saving.")
+
+    def handle(self, *args, **options):
+        try:
+            # an outer transaction so a dry run also forgets a season created by --year
+            with transaction.atomic():
+                house_cup_year = self.house_cup_year(options)
+                with open(options['csv_path'], newline='', encoding='utf-8-sig') as file:
+                    counts = import_season(house_cup_year, file)
+                if options['dry_run']:
+                    transaction.set_rollback(True)
+        except ValidationError as error:
+            for message in error.messages:
+                self.stderr.write(message)
+            raise CommandError(f"Nothing imported: {len(error.messages)} problem(s)")
+        except OSError as error:
+            raise CommandError(error)
+
+        summary = ', '.join(f"{name.replace('_', ' ')}: {count}" for name, count in counts.items())
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING(f"Dry run, rolled back. {summary}"))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Imported into {house_cup_year}. {summary}"))
+
+    def house_cup_year(self, options):
+        if options['season']:
+            house_cup_year = House_Cup_Year.objects.filter(pk=options['season']).first()
+            if house_cup_year is None:
+                raise CommandError(f"House Cup Year {options['season']} does not exist")
+            return house_cup_year
+        house_cup_year, _ = House_Cup_Year.objects.get_or_create(year=options['year'], season=options['number'])
+        return house_cup_year
@@ -0,0 +1,87 @@
+import asyncio
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+class Command(BaseCommand):
+    help = (
+        "Open many idle connections to the live standings stream of a running "
+        "ASGI worker and report how many stay connected."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000/live/standings/')
+        parser.add_argument('--connections', type=int, default=5000)
+        parser.add_argument('--duration', type=float, default=120, help="Seconds to hold the connections open.")
+        parser.add_argument('--ramp', type=int, default=500, help="Connections opened per second.")
+
+    def handle(self, *args, **options):
+        if resource:
+            soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+            wanted = options['connections'] + 64
+            if soft < wanted:
+                if hard != resource.RLIM_INFINITY and hard < wanted:
+                    raise CommandError(f"Open file limit is {hard}; raise it (ulimit -n) to at least {wanted}")
+                resource.setrlimit(resource.RLIMIT_NOFILE, (wanted, hard))
+
+        stats = asyncio.run(self.run(options))
+        self.stdout.write(
+            f"connected={stats['connected']} failed={stats['failed']} "
+            f"still_open={stats['open']} snapshots={stats['snapshots']} "
+            f"heartbeats={stats['heartbeats']} events={stats['events']}"
+        )
+        if stats['open'] < options['connections']:
+            raise CommandError(f"Only {stats['open']} of {options['connections']} connections survived")
+        self.stdout.write(self.style.SUCCESS("All connections held."))
+
+    async def run(self, options):
+        url = urlsplit(options['url'])
+        stats = dict.fromkeys(['connected', 'failed', 'open', 'snapshots', 'heartbeats', 'events'], 0)
+        deadline = time.monotonic() + options['duration']
+        tasks = []
+        for index in range(options['connections']):
+            tasks.append(asyncio.create_task(self.client(url, deadline, stats)))
+            if (index + 1) % options['ramp'] == 0:
+                await asyncio.sleep(1)
+        await asyncio.gather(*tasks)
+        return stats
+
+    async def client(self, url, deadline, stats):
+        try:
+            reader, writer = await asyncio.open_connection(url.hostname, url.port or 80)
+            writer.write(
+                f"GET {url.path}?{url.query} HTTP/1.1\r\nHost: {url.netloc}\r\n"
+                "Accept: text/event-stream\r\n\r\n".encode()
+            )
+            await writer.drain()
+            status = await reader.readline()
+            if b' 200 ' not in status:
+                raise ConnectionError(status)
+        except (OSError, ConnectionError):
+            stats['failed'] += 1
+            return
+        stats['connected'] += 1
+
+        alive = True
+        while alive and time.monotonic() < deadline:
+            try:
+                line = await asyncio.wait_for(reader.readline(), deadline - time.monotonic())
+            except asyncio.TimeoutError:
+                break
+            alive = bool(line)
+            if line.startswith(b': heartbeat'):
+                stats['heartbeats'] += 1
+            elif line.startswith(b'event: snapshot'):
+                stats['snapshots'] += 1
+            elif line.startswith(b'event: standings'):
+                stats['events'] += 1
+        if alive:
+            stats['open'] += 1
+        writer.close()
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from leaderboard import standings, standings_cache
+from leaderboard.models import House_Cup_Year
+
+
+class Command(BaseCommand):
+    help = "Recompute the HouseStanding table from Score and verify it against a full aggregate"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--season', type=int, action='append', dest='seasons',
+            help="House Cup Year id to rebuild (repeatable). Defaults to every season.",
+        )
+        parser.add_argument(
+            '--check', action='store_true',
+            help="Only report drift between the table and the aggregate, do not write.",
+        )
+
+    def handle(self, *args, **options):
+        seasons = options['seasons']
+
+        if options['check']:
+            problems = standings.find_drift(seasons)
+            for problem in problems:
+                self.stderr.write(problem)
+            if problems:
+                raise CommandError(f"{len(problems)} standing value(s) out of date")
+            self.stdout.write(self.style.SUCCESS("Standings match the score aggregate."))
+            return
+
+        written = standings.rebuild(seasons)
+        standings_cache.invalidate(seasons or House_Cup_Year.objects.values_list('pk', flat=True))
+        problems = standings.find_drift(seasons)
+        if problems:
+            for problem in problems:
+                self.stderr.write(problem)
+            raise CommandError("Standings still differ from the aggregate after rebuild")
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {written} standing row(s); verified against aggregate."))
@@ -0,0 +1,194 @@
+import datetime
+import json
+import logging
+import os
+import platform
+import subprocess
+from contextlib import contextmanager
+
+import django
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from leaderboard import export, ranking
+from leaderboard.bench import measure, seed, temporary_database
+from leaderboard.models import Activity, House, House_Cup_Year, Participation, Score
+from leaderboard.scoring import PLACEMENTS, record_placements
+from leaderboard.standings_cache import get_standings
+
+ADMIN_CHANGELISTS = ['score', 'participation']
+
+
+def unscored_activities(house_cup_year, count):
+    """`count` ongoing activities every house is registered for, to score one per run"""
+    activities = []
+    for i in range(count):
+        activity = Activity(
+            name=f'Benchmark {i + 1}', activity_type='sports', house_cup_year=house_cup_year,
+            date=timezone.now(), location='Gym', organizer='SSG', status='ongoing',
+        )
+        activity.points_distribution = activity.points_table.as_dict()
+        activities.append(activity)
+    Activity.objects.bulk_create(activities)
+    Participation.objects.bulk_create([
+        Participation(activity=activity, house=house, status='participated')
+        for activity in activities
+        for house in House.objects.all()
+    ])
+    return iter(activities)
+
+
+def bench(func, repeat):
+    """Queries of one call, then timings of `repeat` more"""
+    with CaptureQueriesContext(connection) as queries:
+        func()
+    return {'queries': len(queries), **measure(func, repeat)}
+
+
+def score_writes(house_cup_year, repeat):
+    houses = list(House.objects.values_list('pk', flat=True)[:len(PLACEMENTS)])
+    activities = unscored_activities(house_cup_year, 2 * (repeat + 1))
+
+    def create_score():
+        # one admin-style save: signals update standings and the ledger
+        activity = next(activities)
+        participation = activity.participations.get(house_id=houses[0])
+        Score.objects.create(activity=activity, house_id=houses[0], participation=participation, placement=1)
+
+    def score_activity():
+        record_placements(next(activities), {house: place for place, house in enumerate(houses, start=1)})
+
+    return {'score_create': bench(create_score, repeat), 'record_placements': bench(score_activity, repeat)}
+
+
+def standings_reads(house_cup_year, repeat):
+    def cold():
+        cache.clear()
+        get_standings(house_cup_year.pk)
+
+    return {
+        'standings_cold': bench(cold, repeat),
+        'standings_warm': bench(lambda: get_standings(house_cup_year.pk), repeat),
+        'leaderboards': bench(lambda: ranking.leaderboards(house_cup_year), repeat),
+    }
+
+
+def admin_changelists(house_cup_year, repeat):
+    client = Client(HTTP_HOST=settings.ALLOWED_HOSTS[0] if settings.ALLOWED_HOSTS else 'localhost')
+    client.force_login(User.objects.create_superuser('benchmark', 'benchmark@example.com', None))
+    results = {}
+    for model in ADMIN_CHANGELISTS:
+        url = reverse(f'admin:leaderboard_{model}_changelist')
+
+        def get(url=url):
+            response = client.get(url)
+            if response.status_code != 200:
+                raise CommandError(f"{url} returned {response.status_code}")
+
+        results[f'admin_{model}_changelist'] = bench(get, repeat)
+    return results
+
+
+def season_export(house_cup_year, repeat):
+    def write():
+        with open(os.devnull, 'w', newline='') as file:
+            export.write_csv(house_cup_year, file)
+
+    return {'export_csv': bench(write, repeat)}
+
+
+SUITES = {
+    'writes': score_writes,
+    'standings': standings_reads,
+    'admin': admin_changelists,
+    'export': season_export,
+}
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+            cwd=settings.BASE_DIR,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+@contextmanager
+def quiet_request_log():
+    # admin requests would each log a timing line; keep budget warnings
+    logger = logging.getLogger('leaderboard.requests')
+    level = logger.level
+    logger.setLevel(logging.WARNING)
+    try:
+        yield
+    finally:
+        logger.setLevel(level)
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway database and time score writes, standings reads, admin changelists and the "
+        "season export; --json saves the results and --compare diffs them against an earlier run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seasons', type=int, default=3)
+        parser.add_argument('--activities', type=int, default=200, help="Activities per season.")
+        parser.add_argument('--houses', type=int, default=5)
+        parser.add_argument('--members', type=int, default=3, help="Roster size per participation.")
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument(
+            '--only', action='append', choices=list(SUITES),
+            help="Run only this suite (repeatable). Defaults to every suite.",
+        )
+        parser.add_argument('--json', dest='json_path', help="Write the results to this file.")
+        parser.add_argument('--compare', dest='compare_path', help="An earlier --json file to compare with.")
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['compare_path']:
+            with open(options['compare_path']) as f:
+                baseline = json.load(f)['results']
+
+        with temporary_database(), quiet_request_log():
+            counts = seed(
+                options['seasons'], options['activities'], options['houses'],
+                members=options['members'], with_ledger=True,
+            )
+            self.stdout.write(f"Seeded {counts}")
+            house_cup_year = House_Cup_Year.objects.order_by('-year').first()
+            results = {}
+            for name in options['only'] or SUITES:
+                results.update(SUITES[name](house_cup_year, options['repeat']))
+
+        for name, result in results.items():
+            line = f"{name:>30}: {result['queries']:>3} queries, {result['median_ms']:9.3f} ms median"
+            previous = (baseline or {}).get(name)
+            if previous:
+                line += f"  (was {previous['median_ms']:.3f} ms, x{result['median_ms'] / previous['median_ms']:.2f})"
+            self.stdout.write(line)
+
+        if options['json_path']:
+            with open(options['json_path'], 'w') as f:
+                json.dump({
+                    'commit': git_commit(),
+                    'created_at': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+                    'environment': {
+                        'python': platform.python_version(),
+                        'django': django.get_version(),
+                        'database': connection.vendor,
+                    },
+                    'options': {key: options[key] for key in ['seasons', 'activities', 'houses', 'members', 'repeat']},
+                    'dataset': counts,
+                    'results': results,
+                }, f, indent=2)
+            self.stdout.write(f"Wrote {options['json_path']}")
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from leaderboard import standings_cache
+from leaderboard.bench import seed
+from leaderboard.models import House, House_Cup_Year
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill an empty database with synthetic seasons (activities with varied points distributions, "
+        "participations with rosters, scores) for profiling. run_benchmarks seeds its own throwaway copy."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seasons', type=int, default=3)
+        parser.add_argument('--activities', type=int, default=60, help="Activities per season.")
+        parser.add_argument('--houses', type=int, default=5)
+        parser.add_argument('--members', type=int, default=3, help="Roster size per participation.")
+        parser.add_argument('--seed', type=int, default=0, help="Random seed; the same options give the same data.")
+
+    def handle(self, *args, **options):
+        if House.objects.exists() or House_Cup_Year.objects.exists():
+            raise CommandError("The database already has houses or seasons; seed_benchmark only fills an empty one.")
+        with transaction.atomic():
+            counts = seed(
+                options['seasons'], options['activities'], options['houses'], options['seed'],
+                members=options['members'], with_ledger=True,
+            )
+        standings_cache.invalidate(House_Cup_Year.objects.values_list('pk', flat=True))
+        self.stdout.write(self.style.SUCCESS(f"Seeded {counts}"))
@@ -0,0 +1,45 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class Command(BaseCommand):
+    help = (
+        "Copy the primary SQLite database onto the replica file (ACLCXP_DB_REPLICA), a local stand-in "
+        "for replication; with --interval, keep copying to mimic a replica that lags"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float,
+            help="Copy again every this many seconds until interrupted.",
+        )
+
+    def handle(self, *args, **options):
+        alias = settings.DATABASE_REPLICA
+        if not alias:
+            raise CommandError("No replica configured; set ACLCXP_DB_REPLICA.")
+        primary, replica = connections[DEFAULT_DB_ALIAS], connections[alias]
+        if primary.vendor != 'sqlite' or replica.vendor != 'sqlite':
+            raise CommandError("Only SQLite files can be copied; use the database's own replication.")
+
+        while True:
+            start = time.perf_counter()
+            # the backup API copies a consistent snapshot while others keep writing
+            source = sqlite3.connect(primary.settings_dict['NAME'])
+            target = sqlite3.connect(replica.settings_dict['NAME'])
+            try:
+                source.backup(target)
+            finally:
+                target.close()
+                source.close()
+            self.stdout.write(
+                f"Copied {primary.settings_dict['NAME']} to {replica.settings_dict['NAME']} "
+                f"in {(time.perf_counter() - start) * 1000:.0f} ms"
+            )
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
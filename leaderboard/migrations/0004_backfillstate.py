@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # before 0005: the backfills of 0005 and 0006 checkpoint into this table
+
+    dependencies = [
+        ('leaderboard', '0004_score_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BackfillState',
+            fields=[
+                ('name', models.CharField(max_length=200, primary_key=True, serialize=False)),
+                ('last_pk', models.CharField(max_length=255)),
+                ('rows_done', models.BigIntegerField()),
+                ('rows_changed', models.BigIntegerField()),
+            ],
+            options={
+                'verbose_name': 'Backfill State',
+                'verbose_name_plural': 'Backfill States',
+            },
+        ),
+    ]
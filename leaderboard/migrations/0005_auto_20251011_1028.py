@@ -2,27 +2,44 @@
 
 from django.db import migrations
 
-from django.db import migrations
+from leaderboard import backfill
+
+
+def default_distribution(max_points):
+    return {
+        1: max_points,
+        2: int(max_points * 0.8),
+        3: int(max_points * 0.6),
+        4: int(max_points * 0.4),
+        5: int(max_points * 0.2)
+    }
+
+
+def set_default_distribution(activity):
+    if activity.points_distribution:
+        return False
+    activity.points_distribution = default_distribution(activity.max_points)
+    return True
+
 
 def populate_points_distribution(apps, schema_editor):
     Activity = apps.get_model('leaderboard', 'Activity')
-    
-    for activity in Activity.objects.all():
-        if not activity.points_distribution:
-            activity.points_distribution = {
-                1: activity.max_points,
-                2: int(activity.max_points * 0.8),
-                3: int(activity.max_points * 0.6),
-                4: int(activity.max_points * 0.4),
-                5: int(activity.max_points * 0.2)
-            }
-            activity.save()
+    backfill.run(
+        '0005_auto_20251011_1028',
+        Activity.objects.only('pk', 'max_points', 'points_distribution'),
+        set_default_distribution,
+        ['points_distribution'],
+        using=schema_editor.connection.alias,
+    )
 
 
 class Migration(migrations.Migration):
+    # every chunk commits on its own, so an interrupted run resumes
+    atomic = False
 
     dependencies = [
         ('leaderboard', '0004_score_updated_at'),
+        ('leaderboard', '0004_backfillstate'),
     ]
 
     operations = [
@@ -1,40 +1,46 @@
 from django.db import migrations
 
+from leaderboard import backfill
+
+
+def complete_distribution(activity):
+    """Fill any missing 1st-5th placement from the defaults"""
+    max_points = activity.max_points
+    default_distribution = {
+        1: max_points,
+        2: int(max_points * 0.8),
+        3: int(max_points * 0.6),
+        4: int(max_points * 0.4),
+        5: int(max_points * 0.2)
+    }
+    # JSON keys come back as strings
+    distribution = {int(placement): points for placement, points in (activity.points_distribution or {}).items()}
+    if activity.points_distribution and all(placement in distribution for placement in default_distribution):
+        return False
+    activity.points_distribution = {**default_distribution, **distribution}
+    return True
+
+
 def fix_points_distribution(apps, schema_editor):
     Activity = apps.get_model('leaderboard', 'Activity')
-    
-    for activity in Activity.objects.all():
-        needs_save = False
-        
-        # Ensure points_distribution exists
-        if not activity.points_distribution:
-            activity.points_distribution = {}
-            needs_save = True
-        
-        # Ensure all placements 1-5 exist
-        default_distribution = {
-            1: activity.max_points,
-            2: int(activity.max_points * 0.8),
-            3: int(activity.max_points * 0.6),
-            4: int(activity.max_points * 0.4),
-            5: int(activity.max_points * 0.2)
-        }
-        
-        for placement in range(1, 6):
-            if placement not in activity.points_distribution:
-                activity.points_distribution[placement] = default_distribution[placement]
-                needs_save = True
-        
-        if needs_save:
-            activity.save()
+    backfill.run(
+        '0006_auto_20251011_1055',
+        Activity.objects.only('pk', 'max_points', 'points_distribution'),
+        complete_distribution,
+        ['points_distribution'],
+        using=schema_editor.connection.alias,
+    )
 
 def reverse_fix(apps, schema_editor):
     pass  # No need to reverse
 
 class Migration(migrations.Migration):
+    # every chunk commits on its own, so an interrupted run resumes
+    atomic = False
 
     dependencies = [
         ('leaderboard', '0005_auto_20251011_1028'),
+        ('leaderboard', '0004_backfillstate'),
     ]
 
     operations = [
@@ -0,0 +1,76 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+MEDAL_FIELDS = ['first_places', 'second_places', 'third_places', 'fourth_places', 'fifth_places']
+
+
+def populate_standings(apps, schema_editor):
+    Score = apps.get_model('leaderboard', 'Score')
+    HouseStanding = apps.get_model('leaderboard', 'HouseStanding')
+
+    medals = {
+        field: Count('id', filter=Q(placement=placement))
+        for placement, field in enumerate(MEDAL_FIELDS, start=1)
+    }
+    rows = (
+        Score.objects.order_by()
+        .values('activity__house_cup_year_id', 'house_id')
+        .annotate(total_points=Sum('points_earned'), **medals)
+    )
+    by_season = {}
+    for row in rows:
+        by_season.setdefault(row['activity__house_cup_year_id'], []).append(row)
+
+    standings = []
+    for house_cup_year_id, season_rows in by_season.items():
+        sort_key = lambda row: [-(row['total_points'] or 0)] + [-row[f] for f in MEDAL_FIELDS]
+        season_rows.sort(key=sort_key)
+        for position, row in enumerate(season_rows, start=1):
+            # tied houses share a rank
+            if position == 1 or sort_key(row) != sort_key(season_rows[position - 2]):
+                rank = position
+            standings.append(HouseStanding(
+                house_id=row['house_id'],
+                house_cup_year_id=house_cup_year_id,
+                total_points=row['total_points'] or 0,
+                rank=rank,
+                **{field: row[field] for field in MEDAL_FIELDS}
+            ))
+    HouseStanding.objects.bulk_create(standings)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leaderboard', '0010_alter_activity_id'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HouseStanding',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_points', models.IntegerField(default=0)),
+                ('first_places', models.PositiveIntegerField(default=0)),
+                ('second_places', models.PositiveIntegerField(default=0)),
+                ('third_places', models.PositiveIntegerField(default=0)),
+                ('fourth_places', models.PositiveIntegerField(default=0)),
+                ('fifth_places', models.PositiveIntegerField(default=0)),
+                ('rank', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('house', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='standings', to='leaderboard.house')),
+                ('house_cup_year', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='standings', to='leaderboard.house_cup_year')),
+            ],
+            options={
+                'verbose_name': 'House Standing',
+                'verbose_name_plural': 'House Standings',
+                'ordering': ['rank'],
+                'indexes': [models.Index(fields=['house_cup_year', 'rank'], name='standing_season_rank_idx')],
+                'unique_together': {('house_cup_year', 'house')},
+            },
+        ),
+        migrations.RunPython(populate_standings, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leaderboard', '0011_housestanding'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='house_cup_year',
+            name='standings_version',
+            field=models.PositiveBigIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:40
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leaderboard', '0012_house_cup_year_standings_version'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='activity',
+            index=models.Index(fields=['house_cup_year', 'status', 'date'], name='activity_season_status_date'),
+        ),
+        migrations.AddIndex(
+            model_name='activity',
+            index=models.Index(fields=['activity_type', 'date'], name='activity_type_date'),
+        ),
+        migrations.AddIndex(
+            model_name='activity',
+            index=models.Index(fields=['date'], name='activity_date'),
+        ),
+        migrations.AddIndex(
+            model_name='score',
+            index=models.Index(fields=['activity', 'house'], name='score_activity_house'),
+        ),
+        migrations.AddIndex(
+            model_name='score',
+            index=models.Index(fields=['house', 'created_at'], name='score_house_created'),
+        ),
+        migrations.AddIndex(
+            model_name='score',
+            index=models.Index(fields=['created_at'], name='score_created'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leaderboard', '0013_leaderboard_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Participant',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255)),
+                ('grade', models.CharField(blank=True, max_length=20)),
+                ('is_captain', models.BooleanField(default=False)),
+                ('participation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='members', to='leaderboard.participation')),
+            ],
+            options={
+                'verbose_name': 'Participant',
+                'verbose_name_plural': 'Participants',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['name'], name='participant_name')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('is_captain', True)), fields=('participation',), name='unique_captain_per_participation')],
+            },
+        ),
+    ]
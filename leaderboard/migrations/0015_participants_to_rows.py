@@ -0,0 +1,63 @@
+from django.db import migrations
+
+BATCH_SIZE = 1000
+
+
+def participants_to_rows(apps, schema_editor):
+    """Copy Participation.participants JSON into Participant rows, in batches"""
+    Participation = apps.get_model('leaderboard', 'Participation')
+    Participant = apps.get_model('leaderboard', 'Participant')
+
+    batch = []
+    participations = Participation.objects.order_by('pk').only('pk', 'participants')
+    for participation in participations.iterator(chunk_size=BATCH_SIZE):
+        has_captain = False
+        for entry in participation.participants or []:
+            if isinstance(entry, str):
+                entry = {'name': entry}
+            name = (entry.get('name') or '').strip()
+            if not name:
+                continue
+            # the JSON never enforced a single captain; keep the first one
+            is_captain = bool(entry.get('is_captain')) and not has_captain
+            has_captain = has_captain or is_captain
+            batch.append(Participant(
+                participation_id=participation.pk,
+                name=name,
+                grade=str(entry.get('grade') or ''),
+                is_captain=is_captain,
+            ))
+        if len(batch) >= BATCH_SIZE:
+            Participant.objects.bulk_create(batch)
+            batch = []
+    Participant.objects.bulk_create(batch)
+
+
+def rows_to_participants(apps, schema_editor):
+    Participation = apps.get_model('leaderboard', 'Participation')
+    Participant = apps.get_model('leaderboard', 'Participant')
+
+    rosters = {}
+    for member in Participant.objects.order_by('participation_id', 'pk').iterator(chunk_size=BATCH_SIZE):
+        data = {'name': member.name}
+        if member.grade:
+            data['grade'] = member.grade
+        if member.is_captain:
+            data['is_captain'] = True
+        rosters.setdefault(member.participation_id, []).append(data)
+
+    participations = list(Participation.objects.filter(pk__in=list(rosters)).only('pk'))
+    for participation in participations:
+        participation.participants = rosters[participation.pk]
+    Participation.objects.bulk_update(participations, ['participants'], batch_size=BATCH_SIZE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leaderboard', '0014_participant'),
+    ]
+
+    operations = [
+        migrations.RunPython(participants_to_rows, rows_to_participants),
+    ]
@@ -0,0 +1,15 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leaderboard', '0015_participants_to_rows'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='participation',
+            name='participants',
+        ),
+    ]
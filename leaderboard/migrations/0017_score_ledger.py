@@ -0,0 +1,74 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:46
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leaderboard', '0016_remove_participation_participants'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScoreEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('award', 'Award'), ('revise', 'Revise'), ('revoke', 'Revoke')], max_length=10)),
+                ('points', models.IntegerField(default=0)),
+                ('placement', models.IntegerField(blank=True, choices=[(1, '1st'), (2, '2nd'), (3, '3rd'), (4, '4th'), (5, '5th')], null=True)),
+                ('previous_points', models.IntegerField(default=0)),
+                ('previous_placement', models.IntegerField(blank=True, choices=[(1, '1st'), (2, '2nd'), (3, '3rd'), (4, '4th'), (5, '5th')], null=True)),
+                ('recorded_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('activity', models.ForeignKey(db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='leaderboard.activity')),
+                ('house', models.ForeignKey(db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='leaderboard.house')),
+                ('house_cup_year', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='leaderboard.house_cup_year')),
+                ('recorded_by', models.ForeignKey(db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('score', models.ForeignKey(db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='events', to='leaderboard.score')),
+            ],
+            options={
+                'verbose_name': 'Score Event',
+                'verbose_name_plural': 'Score Events',
+                'ordering': ['id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='StandingsCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('totals', models.JSONField(default=dict)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='leaderboard.scoreevent')),
+                ('house_cup_year', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='checkpoints', to='leaderboard.house_cup_year')),
+            ],
+            options={
+                'verbose_name': 'Standings Checkpoint',
+                'verbose_name_plural': 'Standings Checkpoints',
+                'ordering': ['-event'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='scoreevent',
+            index=models.Index(fields=['house_cup_year', 'id'], name='scoreevent_season_id'),
+        ),
+        migrations.AddIndex(
+            model_name='scoreevent',
+            index=models.Index(fields=['house_cup_year', 'recorded_at'], name='scoreevent_season_recorded'),
+        ),
+        migrations.AddIndex(
+            model_name='scoreevent',
+            index=models.Index(fields=['activity', 'id'], name='scoreevent_activity_id'),
+        ),
+        migrations.AddIndex(
+            model_name='scoreevent',
+            index=models.Index(fields=['score', 'id'], name='scoreevent_score_id'),
+        ),
+        migrations.AddIndex(
+            model_name='standingscheckpoint',
+            index=models.Index(fields=['house_cup_year', 'event'], name='checkpoint_season_event'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+from django.db import migrations
+
+BATCH_SIZE = 1000
+
+
+def seed_ledger(apps, schema_editor):
+    """Open the ledger with one award per existing score, in the order they were created"""
+    Score = apps.get_model('leaderboard', 'Score')
+    ScoreEvent = apps.get_model('leaderboard', 'ScoreEvent')
+
+    batch = []
+    scores = Score.objects.order_by('created_at', 'pk').values(
+        'pk', 'activity_id', 'activity__house_cup_year_id', 'house_id',
+        'points_earned', 'placement', 'awarded_by_id', 'created_at',
+    )
+    for score in scores.iterator(chunk_size=BATCH_SIZE):
+        batch.append(ScoreEvent(
+            kind='award',
+            score_id=score['pk'],
+            activity_id=score['activity_id'],
+            house_id=score['house_id'],
+            house_cup_year_id=score['activity__house_cup_year_id'],
+            points=score['points_earned'],
+            placement=score['placement'],
+            recorded_by_id=score['awarded_by_id'],
+            recorded_at=score['created_at'],
+        ))
+        if len(batch) >= BATCH_SIZE:
+            ScoreEvent.objects.bulk_create(batch)
+            batch = []
+    ScoreEvent.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leaderboard', '0017_score_ledger'),
+    ]
+
+    operations = [
+        # ScoreEvent rows are dropped with the table when migrating back
+        migrations.RunPython(seed_ledger, migrations.RunPython.noop),
+    ]
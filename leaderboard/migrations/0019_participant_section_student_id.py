@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leaderboard', '0018_seed_score_ledger'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='participant',
+            name='section',
+            field=models.CharField(blank=True, max_length=50),
+        ),
+        migrations.AddField(
+            model_name='participant',
+            name='student_id',
+            field=models.CharField(blank=True, max_length=50),
+        ),
+        migrations.AddIndex(
+            model_name='participant',
+            index=models.Index(fields=['student_id'], name='participant_student_id'),
+        ),
+    ]
@@ -1,23 +1,79 @@
-from email.policy import default
-from enum import auto, unique
-from random import choice
-from tkinter import CASCADE
-from turtle import update
+import copy
+from collections.abc import Mapping
 from django.contrib.auth.models import User
-from django.db import models
+from django.db import models, transaction
 from django.db.models.deletion import PROTECT
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.core.exceptions import ValidationError
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+
+def default_points_distribution(max_points):
+    """Default points per placement: 100%, 80%, 60%, 40%, 20% of max_points"""
+    return {
+        1: max_points,
+        2: int(max_points * 0.8),
+        3: int(max_points * 0.6),
+        4: int(max_points * 0.4),
+        5: int(max_points * 0.2)
+    }
+
+
+class PointsDistribution(Mapping):
+    """Immutable placement -> points table.
+    
+    JSON keys come back from the database as strings; this normalizes them
+    to ints once and fills any missing 1st-5th placement from the defaults.
+    """
+    
+    def __init__(self, distribution, max_points):
+        points = default_points_distribution(max_points)
+        points.update({int(k): int(v) for k, v in (distribution or {}).items()})
+        self._points = points
+    
+    def __getitem__(self, placement):
+        return self._points[int(placement)]
+    
+    def __iter__(self):
+        return iter(sorted(self._points))
+    
+    def __len__(self):
+        return len(self._points)
+    
+    def __repr__(self):
+        return f"PointsDistribution({self.as_dict()})"
+    
+    def points_for(self, placement):
+        """Points for a placement, 0 if none is set"""
+        if not placement:
+            return 0
+        return self._points.get(int(placement), 0)
+    
+    def as_dict(self):
+        """A plain, mutable copy suitable for the JSON field"""
+        return {placement: self._points[placement] for placement in self}
 
 
 # Create your models here.
 class House_Cup_Year(models.Model):
     year = models.DateField()
     season = models.PositiveSmallIntegerField()
+    # bumped on every change to what the API serves (scores, activities, houses, teams); used for ETags
+    standings_version = models.PositiveBigIntegerField(default=0, editable=False)
     
     def __str__(self):
         return f"{self.year} - Season {self.season}"
     
+    def save(self, *args, **kwargs):
+        # the counter only moves by UPDATE ... + 1; never write back a stale copy of it
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'standings_version'
+            ]
+        super().save(*args, **kwargs)
+    
     class Meta:
         verbose_name = "House Cup Year"
         verbose_name_plural = "House Cup Years"
@@ -86,41 +142,57 @@ class Activity(models.Model):
             raise ValidationError({'max_points': 'Max points must be at least 1'})
     
     def save(self, *args, **kwargs):
-        # Ensure points_distribution is always set and complete
-        if not self.points_distribution:
-            self.points_distribution = self.get_default_points_distribution()
-        else:
-            # Ensure all placements 1-5 exist
-            default_distribution = self.get_default_points_distribution()
-            for placement in range(1, 6):
-                if placement not in self.points_distribution:
-                    self.points_distribution[placement] = default_distribution[placement]
+        loaded = getattr(self, '_loaded_values', None) or {}
+        if 'max_points' in loaded and 'points_distribution' in loaded and loaded['max_points'] != self.max_points:
+            # a table left at the defaults follows max_points; a custom one is kept
+            old_table = PointsDistribution(loaded['points_distribution'], loaded['max_points'])
+            if old_table == PointsDistribution(None, loaded['max_points']) and old_table == PointsDistribution(
+                self.points_distribution, loaded['max_points']
+            ):
+                self.points_distribution = {}
         
-        # Ensure points_distribution values are integers
-        self.points_distribution = {
-            int(k): int(v) for k, v in self.points_distribution.items()
-        }
+        # Ensure points_distribution is always set, complete and int-keyed
+        self.__dict__.pop('points_table', None)
+        self.points_distribution = self.points_table.as_dict()
         
-        super().save(*args, **kwargs)
+        # Standings and scores are refreshed by the post_save signal inside this transaction
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+    
+    def refresh_from_db(self, *args, **kwargs):
+        self.__dict__.pop('points_table', None)
+        super().refresh_from_db(*args, **kwargs)
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember what was loaded so signals can tell what changed
+        # (copied, since points_distribution is edited in place)
+        instance._loaded_values = dict(zip(field_names, map(copy.copy, values)))
+        return instance
     
     def get_default_points_distribution(self):
         """Return the default points distribution"""
-        return {
-            1: self.max_points,
-            2: int(self.max_points * 0.8),
-            3: int(self.max_points * 0.6),
-            4: int(self.max_points * 0.4),
-            5: int(self.max_points * 0.2)
-        }
+        return default_points_distribution(self.max_points)
+    
+    @cached_property
+    def points_table(self):
+        """Read-only, int-keyed points table; reset by save() and refresh_from_db()"""
+        return PointsDistribution(self.points_distribution, self.max_points)
     
     def get_points_for_placement(self, placement):
         """Safe method to get points for placement"""
-        if not self.points_distribution:
-            self.save()  # Force creation of points_distribution
-        return self.points_distribution.get(int(placement), 0)
+        return self.points_table.points_for(placement)
     class Meta:
         ordering = ['-date']
         verbose_name_plural = "Activities"
+        indexes = [
+            # season schedule/results pages and the admin status filter
+            models.Index(fields=['house_cup_year', 'status', 'date'], name='activity_season_status_date'),
+            models.Index(fields=['activity_type', 'date'], name='activity_type_date'),
+            # default ordering
+            models.Index(fields=['date'], name='activity_date'),
+        ]
 
 class House(models.Model):
     name = models.CharField(max_length=255)
@@ -149,13 +221,6 @@ class Participation(models.Model):
     status = models.CharField(max_length=20, choices=PARTICIPATION_STATUS, default='registered')
     team_name = models.CharField(max_length=100, blank=True)
     
-    # ENHANCED: Store as list of dictionaries for more flexibility
-    participants = models.JSONField(
-        default=list, 
-        blank=True,
-        help_text="Store as: [{'name': 'John Doe', 'grade': '10', 'is_captain': true}]"
-    )
-    
     registered_at = models.DateTimeField(auto_now_add=True)
     confirmed_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
     confirmed_at = models.DateTimeField(null=True, blank=True)
@@ -169,43 +234,139 @@ class Participation(models.Model):
         return f"{self.house.name} in {self.activity.name}"
     
     # ENHANCED: Helper methods
+    # Roster rows live in Participant; these keep the old JSON-style API working
+    @property
+    def participants(self):
+        """Roster as a list of dicts: [{'name': 'John Doe', 'grade': '10', 'is_captain': True}]"""
+        return [member.as_dict() for member in self.members.all()]
+    
     @property
     def participant_count(self):
-        return len(self.participants)
+        # annotated by list views, otherwise counted
+        if hasattr(self, 'member_count'):
+            return self.member_count
+        return len(self.members.all())
     
     @property
     def captain(self):
         """Get team captain"""
-        for participant in self.participants:
-            if participant.get('is_captain', False):
-                return participant['name']
+        for member in self.members.all():
+            if member.is_captain:
+                return member.name
         return None
     
     @property
     def participant_names(self):
         """Get just the names as a list"""
-        return [p['name'] for p in self.participants if 'name' in p]
+        return [member.name for member in self.members.all()]
     
     def add_participant(self, name, grade=None, is_captain=False):
         """Add a participant to the team"""
-        participant_data = {'name': name.strip()}
-        if grade:
-            participant_data['grade'] = grade
-        if is_captain:
-            participant_data['is_captain'] = True
+        self.add_participants([{'name': name, 'grade': grade, 'is_captain': is_captain}])
+    
+    def add_participants(self, participants):
+        """Add many participants in at most two queries.
         
-        # Remove captain status from others if this is captain
-        if is_captain:
-            for p in self.participants:
-                p['is_captain'] = False
+        `participants` is a list of dicts with 'name' and optional 'grade',
+        'section', 'student_id' and 'is_captain'. A new captain replaces the
+        current one.
+        """
+        members = [Participant.from_dict(p, participation=self) for p in participants]
+        captains = [m for m in members if m.is_captain]
+        if len(captains) > 1:
+            raise ValidationError('A team can only have one captain')
         
-        self.participants.append(participant_data)
-        self.save()
+        with transaction.atomic():
+            if captains:
+                self.members.filter(is_captain=True).update(is_captain=False)
+            Participant.objects.bulk_create(members)
+            self._roster_changed()
+        self._clear_members_cache()
+        return members
     
     def remove_participant(self, name):
         """Remove a participant by name"""
-        self.participants = [p for p in self.participants if p['name'] != name]
-        self.save()
+        return self.remove_participants([name])
+    
+    def remove_participants(self, names):
+        """Remove participants by name in one query"""
+        with transaction.atomic():
+            deleted, _ = self.members.filter(name__in=list(names)).delete()
+            if deleted:
+                self._roster_changed()
+        self._clear_members_cache()
+        return deleted
+    
+    def set_participants(self, participants):
+        """Replace the whole roster"""
+        with transaction.atomic():
+            self.members.all().delete()
+            return self.add_participants(participants)
+    
+    def _roster_changed(self):
+        """Bump the season's version once; bulk roster writes skip the Participant signals"""
+        from . import standings  # standings imports the models
+        standings.bump_version(Activity.objects.filter(pk=self.activity_id).values_list('house_cup_year_id'))
+    
+    def _clear_members_cache(self):
+        getattr(self, '_prefetched_objects_cache', {}).pop('members', None)
+        self.__dict__.pop('member_count', None)
+
+
+class Participant(models.Model):
+    """One student on a house's team for an activity"""
+    participation = models.ForeignKey(Participation, on_delete=models.CASCADE, related_name='members')
+    name = models.CharField(max_length=255)
+    grade = models.CharField(max_length=20, blank=True)
+    section = models.CharField(max_length=50, blank=True)
+    student_id = models.CharField(max_length=50, blank=True)
+    is_captain = models.BooleanField(default=False)
+    
+    def __str__(self):
+        return self.name
+    
+    @classmethod
+    def from_dict(cls, data, **kwargs):
+        """Unsaved Participant from a roster dict (see leaderboard.rosters)"""
+        return cls(
+            name=data['name'].strip(),
+            grade=data.get('grade') or '',
+            section=data.get('section') or '',
+            student_id=data.get('student_id') or '',
+            is_captain=bool(data.get('is_captain')),
+            **kwargs
+        )
+    
+    def as_dict(self):
+        """The legacy JSON shape of a participant"""
+        data = {'name': self.name}
+        if self.grade:
+            data['grade'] = self.grade
+        if self.section:
+            data['section'] = self.section
+        if self.student_id:
+            data['student_id'] = self.student_id
+        if self.is_captain:
+            data['is_captain'] = True
+        return data
+    
+    class Meta:
+        ordering = ['id']
+        verbose_name = "Participant"
+        verbose_name_plural = "Participants"
+        constraints = [
+            models.UniqueConstraint(
+                fields=['participation'],
+                condition=models.Q(is_captain=True),
+                name='unique_captain_per_participation',
+            ),
+        ]
+        indexes = [
+            # "which activities is student X in"
+            models.Index(fields=['name'], name='participant_name'),
+            models.Index(fields=['student_id'], name='participant_student_id'),
+        ]
+
 class Score(models.Model):
     PLACEMENT = [
         (1, '1st'),
@@ -237,46 +398,29 @@ class Score(models.Model):
     
     def clean(self):
         """Validate before saving"""
-        if self.placement:
-            # Ensure activity has points_distribution
-            if not self.activity.points_distribution:
-                self.activity.save()  # Force creation
-            
-            # Check if placement exists in distribution, if not, add it
-            if self.placement not in self.activity.points_distribution:
-                # Auto-create the missing placement
-                default_points = self.activity.get_default_points_distribution()
-                if self.placement in default_points:
-                    self.activity.points_distribution[self.placement] = default_points[self.placement]
-                    self.activity.save()
+        if self.placement and self.activity_id:
+            if self.placement not in self.activity.points_table:
+                raise ValidationError({'placement': f'No points are set for placement {self.placement}'})
     
     def save(self, *args, **kwargs):
-        # Ensure activity has complete points_distribution
-        if self.activity:
-            if not self.activity.points_distribution:
-                self.activity.save()
-            else:
-                # Check if all placements 1-5 exist
-                for placement in range(1, 6):
-                    if placement not in self.activity.points_distribution:
-                        default_points = self.activity.get_default_points_distribution()
-                        self.activity.points_distribution[placement] = default_points[placement]
-                        self.activity.save()
-        
-        # AUTO-CALCULATE points based on placement
+        # AUTO-CALCULATE points based on placement (read-only; never writes the activity)
         if self.placement:
-            # Use default distribution if placement still missing
-            if self.placement not in self.activity.points_distribution:
-                default_points = self.activity.get_default_points_distribution()
-                self.points_earned = default_points.get(self.placement, 0)
-            else:
-                self.points_earned = self.activity.points_distribution.get(self.placement, 0)
+            self.points_earned = self.activity.points_table.points_for(self.placement)
         
         # If no placement specified, ensure points_earned is set
         elif not self.points_earned:
             raise ValidationError('Points earned must be set if no placement is specified')
         
-        super().save(*args, **kwargs)
+        # Standings are updated by the post_save signal inside this transaction
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember what was loaded so signals can tell what changed
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
     
     def __str__(self):
         if self.placement:
@@ -285,10 +429,118 @@ class Score(models.Model):
         else:
             return f"{self.house.name} - {self.points_earned} pts in {self.activity.name}"
     
-    class Meta:
-        ordering = ['-created_at']
-    
     class Meta:
         ordering = ['-created_at']
         verbose_name = "Score"
         verbose_name_plural = "Scores"
+        indexes = [
+            models.Index(fields=['activity', 'house'], name='score_activity_house'),
+            models.Index(fields=['house', 'created_at'], name='score_house_created'),
+            # default ordering
+            models.Index(fields=['created_at'], name='score_created'),
+        ]
+
+class HouseStanding(models.Model):
+    """Materialized standings: one row per house per House Cup Year"""
+    house = models.ForeignKey(House, on_delete=models.CASCADE, related_name='standings')
+    house_cup_year = models.ForeignKey(House_Cup_Year, on_delete=models.CASCADE, related_name='standings')
+    total_points = models.IntegerField(default=0)
+    
+    # medal counts, used as tiebreakers
+    first_places = models.PositiveIntegerField(default=0)
+    second_places = models.PositiveIntegerField(default=0)
+    third_places = models.PositiveIntegerField(default=0)
+    fourth_places = models.PositiveIntegerField(default=0)
+    fifth_places = models.PositiveIntegerField(default=0)
+    
+    rank = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"#{self.rank} {self.house.name} - {self.total_points} pts ({self.house_cup_year})"
+    
+    class Meta:
+        ordering = ['rank']
+        unique_together = ['house_cup_year', 'house']
+        indexes = [models.Index(fields=['house_cup_year', 'rank'], name='standing_season_rank_idx')]
+        verbose_name = "House Standing"
+        verbose_name_plural = "House Standings"
+
+class ScoreEvent(models.Model):
+    """
+    Append-only ledger of score changes; never updated or deleted.
+    
+    References are kept without database constraints so history survives
+    deleting the scores, activities and houses it talks about.
+    """
+    AWARD = 'award'
+    REVISE = 'revise'
+    REVOKE = 'revoke'
+    KIND = [
+        (AWARD, 'Award'),
+        (REVISE, 'Revise'),
+        (REVOKE, 'Revoke'),
+    ]
+    
+    kind = models.CharField(max_length=10, choices=KIND)
+    score = models.ForeignKey(Score, on_delete=models.DO_NOTHING, db_constraint=False, null=True, related_name='events')
+    activity = models.ForeignKey(Activity, on_delete=models.DO_NOTHING, db_constraint=False, null=True, related_name='+')
+    house = models.ForeignKey(House, on_delete=models.DO_NOTHING, db_constraint=False, null=True, related_name='+')
+    house_cup_year = models.ForeignKey(House_Cup_Year, on_delete=models.DO_NOTHING, db_constraint=False, related_name='+')
+    
+    # the score's contribution after and before this event
+    points = models.IntegerField(default=0)
+    placement = models.IntegerField(null=True, blank=True, choices=Score.PLACEMENT)
+    previous_points = models.IntegerField(default=0)
+    previous_placement = models.IntegerField(null=True, blank=True, choices=Score.PLACEMENT)
+    
+    recorded_by = models.ForeignKey(User, on_delete=models.DO_NOTHING, db_constraint=False, null=True, related_name='+')
+    recorded_at = models.DateTimeField(default=timezone.now)
+    
+    def __str__(self):
+        return f"{self.get_kind_display()} #{self.score_id}: {self.previous_points} → {self.points} pts"
+    
+    class Meta:
+        ordering = ['id']
+        verbose_name = "Score Event"
+        verbose_name_plural = "Score Events"
+        indexes = [
+            # replay tail after a checkpoint / "as of time T"
+            models.Index(fields=['house_cup_year', 'id'], name='scoreevent_season_id'),
+            models.Index(fields=['house_cup_year', 'recorded_at'], name='scoreevent_season_recorded'),
+            models.Index(fields=['activity', 'id'], name='scoreevent_activity_id'),
+            models.Index(fields=['score', 'id'], name='scoreevent_score_id'),
+        ]
+
+class StandingsCheckpoint(models.Model):
+    """Season totals after `event`, so replays start here instead of at the first event"""
+    house_cup_year = models.ForeignKey(House_Cup_Year, on_delete=models.CASCADE, related_name='checkpoints')
+    event = models.ForeignKey(ScoreEvent, on_delete=models.CASCADE, related_name='+')
+    # house id -> [total_points, first_places, ..., fifth_places]
+    totals = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"{self.house_cup_year} after event #{self.event_id}"
+    
+    class Meta:
+        ordering = ['-event']
+        indexes = [models.Index(fields=['house_cup_year', 'event'], name='checkpoint_season_event')]
+        verbose_name = "Standings Checkpoint"
+        verbose_name_plural = "Standings Checkpoints"
+
+class BackfillState(models.Model):
+    """Checkpoint of an unfinished data-migration backfill (leaderboard.backfill)"""
+    # the migration's name
+    name = models.CharField(max_length=200, primary_key=True)
+    # text, so a backfill over any primary key type can resume
+    last_pk = models.CharField(max_length=255)
+    rows_done = models.BigIntegerField()
+    rows_changed = models.BigIntegerField()
+    
+    def __str__(self):
+        return f"{self.name} after pk {self.last_pk}"
+    
+    class Meta:
+        verbose_name = "Backfill State"
+        verbose_name_plural = "Backfill States"
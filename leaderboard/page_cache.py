@@ -0,0 +1,74 @@
+"""
+Whole-page cache for the public pages.
+
+A rendered page is stored per path, auth state (anonymous visitors and
+signed-in users never share an entry) and an optional version, e.g. the
+season's standings version, so a score change shows on the next request
+without waiting for the timeout. Only plain 200 responses to GET/HEAD that
+set no cookies are stored.
+
+acached_render() is the same for async views: a hit is read through
+async_cache (on the event loop for the locmem cache), a miss renders in a
+thread.
+"""
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.shortcuts import render
+from django.utils.cache import patch_vary_headers
+
+from . import async_cache
+
+
+def page_key(request, version=None):
+    auth = 'user' if request.user.is_authenticated else 'anon'
+    return f'page:{request.path}:{auth}:{version}'
+
+
+def cached_render(request, template_name, context=None, version=None):
+    """
+    render() through the page cache. `context` may be a callable so its
+    queries only run when the page is actually rendered.
+    """
+    if request.method not in ('GET', 'HEAD'):
+        return render(request, template_name, context() if callable(context) else context)
+
+    key = page_key(request, version)
+    cached = cache.get(key)
+    if cached is not None:
+        content, content_type = cached
+        response = HttpResponse(content, content_type=content_type)
+    else:
+        response = render(request, template_name, context() if callable(context) else context)
+        if response.status_code == 200 and not response.cookies:
+            cache.set(key, (response.content, response['Content-Type']), settings.PAGE_CACHE_TIMEOUT)
+    # the entry depends on the session cookie (auth state); keep shared caches honest
+    patch_vary_headers(response, ['Cookie'])
+    return response
+
+
+async def acached_render(request, template_name, context=None, version=None):
+    """
+    cached_render() for async views. `context` may be an async callable.
+    request.user must already be loaded (await request.auser()).
+    """
+    async def rendered():
+        values = await context() if callable(context) else context
+        # templates may still touch the database (the cache tag with the db backend)
+        return await sync_to_async(render)(request, template_name, values)
+
+    if request.method not in ('GET', 'HEAD'):
+        return await rendered()
+
+    key = page_key(request, version)
+    cached = await async_cache.get(key)
+    if cached is not None:
+        content, content_type = cached
+        response = HttpResponse(content, content_type=content_type)
+    else:
+        response = await rendered()
+        if response.status_code == 200 and not response.cookies:
+            await cache.aset(key, (response.content, response['Content-Type']), settings.PAGE_CACHE_TIMEOUT)
+    patch_vary_headers(response, ['Cookie'])
+    return response
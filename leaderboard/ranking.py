@@ -0,0 +1,116 @@
+"""
+Overall and per-category leaderboards.
+
+One grouped aggregate over a season's scores returns, per house, the
+points and 1st-5th place counts of every board at once: conditional
+Sum/Count on Activity.activity_type pivot the categories into columns, so
+adding a category adds columns, not queries.
+
+Boards are ordered like the stored standings (standings.standing_sort_key):
+total points, then most 1st places, 2nd places, and so on. Each entry
+carries its competition rank (1, 2, 2, 4), dense rank (1, 2, 2, 3) and the
+reasons it is split from, or tied with, the houses next to it.
+"""
+from dataclasses import dataclass, field
+
+from django.db.models import Count, Q, Sum
+
+from .models import Activity, Score
+from .standings import MEDAL_FIELDS, TOTAL_FIELDS, standing_sort_key
+
+OVERALL = 'overall'
+CATEGORIES = tuple(value for value, _ in Activity.ACTIVITY_TYPE)
+ORDINALS = {1: '1st', 2: '2nd', 3: '3rd', 4: '4th', 5: '5th'}
+
+
+@dataclass
+class Entry:
+    """One house on one board"""
+    house_id: int
+    house: str
+    total_points: int = 0
+    first_places: int = 0
+    second_places: int = 0
+    third_places: int = 0
+    fourth_places: int = 0
+    fifth_places: int = 0
+    rank: int = 0
+    dense_rank: int = 0
+    tiebreaks: list = field(default_factory=list)
+
+    def as_dict(self):
+        return {
+            'house_id': self.house_id,
+            'house': self.house,
+            'rank': self.rank,
+            'dense_rank': self.dense_rank,
+            **{name: getattr(self, name) for name in TOTAL_FIELDS},
+            'tiebreaks': self.tiebreaks,
+        }
+
+
+def board_columns(categories=CATEGORIES):
+    """Aggregate name -> expression for every board's totals"""
+    columns = {}
+    for board in [OVERALL, *categories]:
+        in_board = Q() if board == OVERALL else Q(activity__activity_type=board)
+        # an empty Q() is no filter at all
+        columns[f'{board}_total_points'] = Sum('points_earned', filter=in_board or None)
+        for placement, medal in MEDAL_FIELDS.items():
+            columns[f'{board}_{medal}'] = Count('id', filter=in_board & Q(placement=placement))
+    return columns
+
+
+def _board_query(categories):
+    # built per call: a cached QuerySet would keep the database alias and
+    # settings of its first caller, and the router picks those per request
+    return (
+        Score.objects.order_by()
+        .values('house_id', 'house__name')
+        .annotate(**board_columns(categories))
+    )
+
+
+def _tiebreak(entry, other):
+    """Why `entry` and `other` (equal on points) are ordered as they are"""
+    for placement, medal in MEDAL_FIELDS.items():
+        mine, theirs = getattr(entry, medal), getattr(other, medal)
+        if mine != theirs:
+            side = 'ahead of' if mine > theirs else 'behind'
+            return f"{side} {other.house} on {ORDINALS[placement]} places ({mine} vs {theirs})"
+    return f"tied with {other.house}"
+
+
+def rank(entries):
+    """Sort a board in place and set ranks and tiebreak reasons"""
+    entries.sort(key=lambda entry: (standing_sort_key(entry), entry.house))
+    keys = [standing_sort_key(entry) for entry in entries]
+    dense_rank = 0
+    for position, (entry, key) in enumerate(zip(entries, keys)):
+        if position and key == keys[position - 1]:
+            entry.rank = entries[position - 1].rank
+        else:
+            entry.rank = position + 1
+            dense_rank += 1
+        entry.dense_rank = dense_rank
+        for neighbour in (position - 1, position + 1):
+            if 0 <= neighbour < len(entries) and entries[neighbour].total_points == entry.total_points:
+                entry.tiebreaks.append(_tiebreak(entry, entries[neighbour]))
+    return entries
+
+
+def leaderboards(house_cup_year, categories=CATEGORIES):
+    """
+    {board: [Entry, ...]} for the overall board and each category, from a
+    single query. Every house with a score in the season is on every board.
+    """
+    categories = tuple(categories)
+    boards = {board: [] for board in [OVERALL, *categories]}
+    for row in _board_query(categories).filter(activity__house_cup_year=house_cup_year):
+        for board, entries in boards.items():
+            entries.append(Entry(
+                house_id=row['house_id'],
+                house=row['house__name'],
+                **{name: row[f'{board}_{name}'] or 0 for name in TOTAL_FIELDS},
+            ))
+    return {board: rank(entries) for board, entries in boards.items()}
@@ -0,0 +1,152 @@
+"""
+Roster text parsing, shared by the Participation admin, season imports and
+exports.
+
+One participant per entry; entries are separated by newlines or ";" (the
+season export's form). An entry is a name followed by optional markers in
+any order:
+
+    John Doe - Grade 10 - Section Rizal (Captain) #2023-00123
+
+  grade       "Grade 10", "Gr. 10"               (1-12)
+  section     "Section Rizal", "Sec. A"
+  captain     "(Captain)", "(capt)", "[captain]"  (any case)
+  student id  "#2023-00123", "ID: 2023-00123"
+
+Any other parenthetical stays part of the name, as the admin always read
+it: "Bob Smith (Team Lead) - Grade 10" is "Bob Smith (Team Lead)" in grade
+10. The whole entry is matched by one precompiled expression.
+"""
+import re
+from collections import namedtuple
+
+from django.core.exceptions import ValidationError
+
+MIN_GRADE, MAX_GRADE = 1, 12
+GRADES = {str(grade) for grade in range(MIN_GRADE, MAX_GRADE + 1)}
+MAX_NAME_LENGTH = 255
+
+# Words of the name, and bracketed groups other than the captain marker,
+# run up to the first marker; possessive runs keep the match linear (no
+# backtracking into a word). Only the keywords are case-insensitive, which
+# keeps the character classes fast.
+ENTRY_RE = re.compile(r"""
+    ^\s*
+    (?P<name>
+        [^()\[\]\#\s,-]++
+        (?:
+            [\s,-]++ (?! (?i:grade|gr\.?)\s*\d | (?i:section|sec)\b | (?i:ID): ) [^()\[\]\#\s,-]++
+          | \s*+ (?! [(\[]\s*(?i:captain|capt\.?)\s*[)\]] ) [(\[] [^()\[\]]*+ [)\]]
+        )*+
+    )
+    (?:
+        \s*[-,]?\s*
+        (?:
+            (?i:grade|gr\.?)\s*0*(?P<grade>\d+)
+          | (?i:section|sec)\b\.?\s*(?P<section>[^\s()\[\]\#,]+)
+          | [(\[]\s*(?P<captain>(?i:captain|capt\.?))\s*[)\]]
+          | (?:\#|\b(?i:ID):\s*)(?P<student_id>[A-Za-z0-9][\w-]*)
+        )
+    )*
+    [\s,-]*$
+""", re.VERBOSE)
+SEPARATOR_RE = re.compile(r'[;\n]')
+
+# A parsed, non-blank entry: `participant` is a dict, or None with an `error`
+RosterLine = namedtuple('RosterLine', ['number', 'text', 'participant', 'error'])
+
+
+class RosterError(ValueError):
+    pass
+
+
+def parse_participant(entry):
+    """
+    One roster entry -> {'name': ..., 'grade': ..., 'section': ...,
+    'student_id': ..., 'is_captain': True} with only the parts present, or
+    None for a blank entry. Raises RosterError if it cannot be read.
+    """
+    match = ENTRY_RE.match(entry)
+    if match is None:
+        entry = entry.strip()
+        if not entry:
+            return None
+        if entry[0] in '-#([':
+            raise RosterError("missing a name")
+        raise RosterError(
+            "could not read it; use e.g. \"John Doe - Grade 10 - Section A (Captain) #2023-001\""
+        )
+
+    name, grade, section, captain, student_id = match.group('name', 'grade', 'section', 'captain', 'student_id')
+    if '  ' in name or '\t' in name:
+        name = ' '.join(name.split())
+    if len(name) > MAX_NAME_LENGTH:
+        raise RosterError(f"name is longer than {MAX_NAME_LENGTH} characters")
+    participant = {'name': name}
+    if grade:
+        if grade not in GRADES:
+            raise RosterError(f"grade {grade} is not between {MIN_GRADE} and {MAX_GRADE}")
+        participant['grade'] = grade
+    if section:
+        participant['section'] = section
+    if student_id:
+        participant['student_id'] = student_id
+    if captain:
+        participant['is_captain'] = True
+    return participant
+
+
+def iter_roster(lines, start=1):
+    """
+    Parse an iterable of roster entries lazily (a file, a list of lines,
+    split text). Yields a RosterLine for each non-blank entry; a second
+    captain is reported as an error on its line.
+    """
+    has_captain = False
+    # skips the namedtuple's Python-level __new__ on the hot path
+    make_line = tuple.__new__
+    for number, text in enumerate(lines, start=start):
+        try:
+            participant = parse_participant(text)
+        except RosterError as error:
+            yield RosterLine(number, text, None, str(error))
+            continue
+        if participant is None:
+            continue
+        if 'is_captain' in participant:
+            if has_captain:
+                yield RosterLine(number, text, None, "a team can only have one captain")
+                continue
+            has_captain = True
+        yield make_line(RosterLine, (number, text, participant, None))
+
+
+def split_entries(text):
+    return SEPARATOR_RE.split(text or '')
+
+
+def parse_participants(text, label='Line'):
+    """Roster text -> list of participant dicts; raises ValidationError naming every bad entry"""
+    participants, errors = [], []
+    for line in iter_roster(split_entries(text)):
+        if line.error:
+            errors.append(f"{label} {line.number} ({line.text.strip()!r}): {line.error}")
+        else:
+            participants.append(line.participant)
+    if errors:
+        raise ValidationError(errors)
+    return participants
+
+
+def format_participant(participant):
+    """Inverse of parse_participant, in the form the admin roster box shows"""
+    text = participant['name']
+    if participant.get('grade'):
+        text += f" - Grade {participant['grade']}"
+    if participant.get('section'):
+        text += f" - Section {participant['section']}"
+    if participant.get('is_captain'):
+        text += " (Captain)"
+    if participant.get('student_id'):
+        text += f" #{participant['student_id']}"
+    return text
@@ -0,0 +1,156 @@
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Case, F, Value, When
+from django.utils import timezone
+
+from . import ledger, standings
+from .models import Score
+
+PLACEMENTS = dict(Score.PLACEMENT)
+INELIGIBLE_STATUSES = ['absent', 'disqualified']
+# activities per SELECT + UPDATE in recompute_points; keeps both under SQLite's parameter limit
+RECOMPUTE_CHUNK = 500
+
+
+def record_placements(activity, placements, awarded_by=None):
+    """
+    Score a whole activity in one transaction.
+
+    `placements` maps house id -> placement, or None to clear a house's
+    placement: its score stays, with no placement and 0 points. Every
+    placed house must have an eligible Participation in the activity.
+    Runs a constant number of queries however many houses are scored;
+    returns the saved Score objects. Raises ValidationError if a house
+    already has more than one score for the activity.
+    """
+    participations = {
+        p.house_id: p
+        for p in activity.participations.filter(house_id__in=list(placements)).select_related('house')
+    }
+    scores = {}
+    for score in activity.scores.filter(house_id__in=list(placements)).select_related('house'):
+        scores.setdefault(score.house_id, []).append(score)
+
+    errors = []
+    for house_scores in scores.values():
+        if len(house_scores) > 1:
+            # which one to place is for a person to decide; updating one would leave the others counted
+            errors.append(
+                f"{house_scores[0].house.name} has {len(house_scores)} scores for {activity.name}; "
+                "delete the extra ones first."
+            )
+    for house_id, placement in placements.items():
+        if placement is None:
+            # clearing is always allowed, e.g. for a house found absent afterwards
+            continue
+        participation = participations.get(house_id)
+        if participation is None:
+            errors.append(f"House {house_id} is not registered for {activity.name}.")
+        elif participation.status in INELIGIBLE_STATUSES:
+            errors.append(f"{participation.house.name} is marked {participation.get_status_display().lower()}.")
+        if placement not in PLACEMENTS:
+            errors.append(f"{placement} is not a valid placement.")
+    if errors:
+        raise ValidationError(errors)
+
+    # one read of the points table for every score
+    points_table = activity.points_table
+
+    existing = {house_id: house_scores[0] for house_id, house_scores in scores.items()}
+
+    now = timezone.now()
+    to_create, to_update, previous = [], [], {}
+    for house_id, placement in placements.items():
+        score = existing.get(house_id)
+        if score is None and placement is None:
+            # nothing to clear
+            continue
+        if score is None:
+            score = Score(activity=activity, house_id=house_id)
+            to_create.append(score)
+        else:
+            previous[house_id] = standings.score_contribution(score)
+            # loaded values go stale after a bulk write; later saves recompute the season
+            del score._loaded_values
+            score.updated_at = now
+            to_update.append(score)
+        if placement is not None:
+            score.participation = participations[house_id]
+        score.placement = placement
+        score.points_earned = points_table.points_for(placement)
+        if awarded_by is not None:
+            score.awarded_by = awarded_by
+
+    with transaction.atomic():
+        Score.objects.bulk_create(to_create)
+        if to_update:
+            Score.objects.bulk_update(
+                to_update, ['participation', 'placement', 'points_earned', 'awarded_by', 'updated_at']
+            )
+        # bulk writes skip the Score signals, so ledger the changes and refresh the season in one pass
+        events = []
+        for score in to_create + to_update:
+            events += ledger.events_for_change(
+                score, previous.get(score.house_id), standings.score_contribution(score), awarded_by
+            )
+        ledger.append(events)
+        standings.rebuild([activity.house_cup_year_id])
+        standings.notify_changed([activity.house_cup_year_id])
+    return to_create + to_update
+
+
+def recompute_points(activities, recorded_by=None, chunk_size=RECOMPUTE_CHUNK):
+    """
+    Re-derive points_earned of the placed scores of `activities` from their
+    current points tables, after a points_distribution or max_points change.
+
+    Per chunk_size activities, one SELECT reads the placed scores and one
+    UPDATE ... SET points_earned = CASE WHEN placement = ... AND activity_id
+    IN (...) THEN ... END writes the ones that differ, whatever the number
+    of scores. The changes are ledgered as revisions
+    and the affected seasons rebuilt, atomically with the caller's
+    transaction. Returns the number of scores changed.
+    """
+    activities = {activity.pk: activity for activity in activities}
+    changed = []
+    now = timezone.now()
+    with transaction.atomic():
+        ids = list(activities)
+        for start in range(0, len(ids), chunk_size):
+            chunk = ids[start:start + chunk_size]
+            scores = Score.objects.filter(activity_id__in=chunk, placement__isnull=False).only(
+                'activity_id', 'house_id', 'placement', 'points_earned', 'awarded_by_id',
+            )
+            stale = []
+            for score in scores:
+                points = activities[score.activity_id].points_table.points_for(score.placement)
+                if points != score.points_earned:
+                    stale.append((score, points))
+            if not stale:
+                continue
+            # activities sharing a table share its WHEN clauses
+            groups = {}
+            for score, points in stale:
+                groups.setdefault((score.placement, points), set()).add(score.activity_id)
+            Score.objects.filter(pk__in=[score.pk for score, _ in stale]).update(
+                points_earned=Case(
+                    *[When(placement=placement, activity_id__in=sorted(ids), then=Value(points))
+                      for (placement, points), ids in groups.items()],
+                    default=F('points_earned'),
+                ),
+                updated_at=now,
+            )
+            changed += stale
+
+        events = []
+        for score, points in changed:
+            # the activity is already loaded; not a query per score
+            score.activity = activities[score.activity_id]
+            old = standings.score_contribution(score)
+            events += ledger.events_for_change(score, old, old._replace(points=points), recorded_by)
+        ledger.append(events)
+        seasons = {activities[score.activity_id].house_cup_year_id for score, _ in changed}
+        if seasons:
+            standings.rebuild(seasons)
+            standings.notify_changed(seasons)
+    return len(changed)
@@ -0,0 +1,59 @@
+"""Plain-dict representations of leaderboard models for the JSON API"""
+
+
+def serialize_house_cup_year(house_cup_year):
+    return {
+        'id': house_cup_year.pk,
+        'year': house_cup_year.year.isoformat(),
+        'season': house_cup_year.season,
+        'version': house_cup_year.standings_version,
+    }
+
+
+def serialize_standing(standing):
+    return {
+        'house_id': standing.house_id,
+        'house': standing.house.name,
+        'rank': standing.rank,
+        'total_points': standing.total_points,
+        'first_places': standing.first_places,
+        'second_places': standing.second_places,
+        'third_places': standing.third_places,
+        'fourth_places': standing.fourth_places,
+        'fifth_places': standing.fifth_places,
+    }
+
+
+def serialize_score(score):
+    return {
+        'id': score.pk,
+        'house_id': score.house_id,
+        'house': score.house.name,
+        'placement': score.placement,
+        'placement_display': score.get_placement_display() if score.placement else None,
+        'points_earned': score.points_earned,
+        'team_name': score.participation.team_name,
+        'updated_at': score.updated_at.isoformat(),
+    }
+
+
+def serialize_activity(activity, results=None):
+    data = {
+        'id': activity.pk,
+        'name': activity.name,
+        'activity_type': activity.activity_type,
+        'activity_type_display': activity.get_activity_type_display(),
+        'status': activity.status,
+        'date': activity.date.isoformat(),
+        'location': activity.location,
+        'organizer': activity.organizer,
+        'max_points': activity.max_points,
+        'points_distribution': {str(k): v for k, v in activity.points_table.items()},
+        'season_id': activity.house_cup_year_id,
+    }
+    if results is not None:
+        data['results'] = [
+            {'house': score.house.name, 'placement': score.placement, 'points_earned': score.points_earned}
+            for score in results
+        ]
+    return data
@@ -0,0 +1,151 @@
+import copy
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import ledger, scoring, standings
+from .models import Activity, House, House_Cup_Year, Participant, Participation, PointsDistribution, Score
+from .standings import Contribution
+
+SCORE_FIELDS = ['house_id', 'activity_id', 'points_earned', 'placement']
+ACTIVITY_FIELDS = ['house_cup_year_id', 'points_distribution', 'max_points']
+
+
+def _loaded(instance, fields):
+    """Values loaded from the database for `fields`, or None if unknown"""
+    loaded = getattr(instance, '_loaded_values', None)
+    if not loaded or any(field not in loaded for field in fields):
+        return None
+    return {field: loaded[field] for field in fields}
+
+
+def _remember(instance, fields):
+    instance._loaded_values = {field: copy.copy(getattr(instance, field)) for field in fields}
+
+
+@receiver(post_save, sender=Score)
+def update_standings_on_score_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    old_values = None if created else _loaded(instance, SCORE_FIELDS)
+    if not created and old_values is None:
+        # Previous state unknown (instance was not loaded from the DB)
+        standings.recompute_season(instance.activity.house_cup_year_id)
+        standings.notify_changed([instance.activity.house_cup_year_id])
+        # ...but the ledger knows what it last recorded
+        ledger.append(ledger.events_for_change(
+            instance, ledger.last_contribution(instance), standings.score_contribution(instance)
+        ))
+    else:
+        old = standings.score_contribution(instance, old_values) if old_values else None
+        new = standings.score_contribution(instance)
+        standings.apply_score_change(old, new)
+        ledger.append(ledger.events_for_change(instance, old, new))
+        seasons = {c.house_cup_year_id for c in (old, new) if c}
+        standings.bump_version(seasons)
+        if old != new:
+            standings.notify_changed(seasons)
+    _remember(instance, SCORE_FIELDS)
+
+
+@receiver(post_delete, sender=Score)
+def update_standings_on_score_delete(sender, instance, **kwargs):
+    old = standings.score_contribution(instance, _loaded(instance, SCORE_FIELDS))
+    standings.apply_score_change(old, None)
+    ledger.append(ledger.events_for_change(instance, old, None))
+    if old:
+        standings.bump_version([old.house_cup_year_id])
+        standings.notify_changed([old.house_cup_year_id])
+
+
+@receiver(post_save, sender=Activity)
+def update_standings_on_activity_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        standings.bump_version([instance.house_cup_year_id])
+        _remember(instance, ACTIVITY_FIELDS)
+        return
+    old_values = _loaded(instance, ACTIVITY_FIELDS)
+    seasons = set()
+    if old_values is None:
+        # previous table unknown: re-derive every score
+        rescored = scoring.recompute_points([instance])
+    else:
+        if old_values['house_cup_year_id'] != instance.house_cup_year_id:
+            seasons = {old_values['house_cup_year_id'], instance.house_cup_year_id}
+            _record_season_move(instance, old_values['house_cup_year_id'])
+        old_distribution = PointsDistribution(old_values['points_distribution'], old_values['max_points'])
+        # rebuilds the season when any score's points change
+        rescored = scoring.recompute_points([instance]) if old_distribution != instance.points_table else 0
+    if seasons:
+        standings.rebuild(seasons)
+        standings.notify_changed(seasons)
+    elif not rescored:
+        # name, date, status... changed; the activity list is still stale
+        standings.bump_version([instance.house_cup_year_id])
+    _remember(instance, ACTIVITY_FIELDS)
+
+
+def _record_season_move(activity, old_house_cup_year_id):
+    """Ledger every score of an activity leaving one season for another"""
+    events = []
+    for score in activity.scores.all():
+        contribution = standings.score_contribution(score)
+        events += ledger.events_for_change(
+            score, contribution._replace(house_cup_year_id=old_house_cup_year_id), contribution
+        )
+    ledger.append(events)
+
+
+@receiver(post_delete, sender=Activity)
+def bump_version_on_activity_delete(sender, instance, **kwargs):
+    standings.bump_version([instance.house_cup_year_id])
+
+
+def _activity_season(**filters):
+    """The season of the activity matching `filters`, as a subquery for bump_version"""
+    return Activity.objects.filter(**filters).values_list('house_cup_year_id', flat=True)
+
+
+@receiver(post_save, sender=House)
+@receiver(post_delete, sender=House)
+def bump_versions_on_house_change(sender, instance, raw=False, **kwargs):
+    """Every season lists every house, and cached standings hold the names"""
+    if raw:
+        return
+    seasons = list(House_Cup_Year.objects.values_list('pk', flat=True))
+    standings.bump_version(seasons)
+    standings.notify_changed(seasons)
+
+
+@receiver(post_save, sender=House_Cup_Year)
+def bump_version_on_season_save(sender, instance, created, raw=False, **kwargs):
+    # a deleted season has no ETag left to change
+    if raw or created:
+        return
+    standings.bump_version([instance.pk])
+    instance.refresh_from_db(fields=['standings_version'])
+
+
+@receiver(post_save, sender=Participation)
+@receiver(post_delete, sender=Participation)
+def bump_version_on_participation_change(sender, instance, raw=False, **kwargs):
+    # team names are part of the activity scores
+    if not raw:
+        standings.bump_version(_activity_season(pk=instance.activity_id))
+
+
+@receiver(post_save, sender=Participant)
+def bump_version_on_participant_save(sender, instance, raw=False, **kwargs):
+    # Participation.add_participants() bulk-creates and bumps once itself
+    if not raw:
+        standings.bump_version(_activity_season(participations=instance.participation_id))
+
+
+@receiver(post_delete, sender=Participant)
+def bump_version_on_participant_delete(sender, instance, origin=None, **kwargs):
+    # Only a member deleted on its own: roster queryset deletes (Participation.remove_participants)
+    # and cascades from a participation, activity or house bump once for the whole batch
+    if isinstance(origin, Participant):
+        standings.bump_version(_activity_season(participations=instance.participation_id))
@@ -0,0 +1,208 @@
+"""
+"Can we still win?" - what-if standings for the rest of a season.
+
+Every house is assumed to compete in every remaining (scheduled or ongoing,
+not yet scored) activity and to take each finishing order with equal
+probability. Points only: ties share a place here, where the standings
+table would break them on medals.
+
+Outcome bounds come from pairwise extremes: house A finishes above house
+B in every outcome iff A's worst case beats B's best case, since A last
+and B first is always one outcome. Clinching is exact; the finishes are
+bounds, not always reached, because each rival is weighed on its own: two
+rivals that could each pass a house, but not both in the same outcome,
+still put its worst_finish at 3. From that:
+
+  clinched     above every other house in every outcome
+  eliminated   some house is above it in every outcome, or some k of
+               the others must average more than its best total (it
+               winning every remaining activity is its best case); a
+               house is never marked eliminated while it can still win,
+               but a rare one that cannot may stay "alive"
+  best_finish  it cannot finish higher than this (it may not reach it)
+  worst_finish it cannot finish lower than this (it may not fall to it)
+
+Win probabilities come from Monte Carlo over random finishing orders,
+vectorized with NumPy and run in chunks so memory stays bounded. NumPy is
+imported on first use, not with the module: the API imports this module,
+and loading NumPy would add about 100 ms to every cold start.
+"""
+import importlib.util
+import itertools
+from dataclasses import dataclass
+from math import factorial
+
+from django.db.models import Exists, OuterRef
+
+from .models import Activity, House, HouseStanding, Score
+
+REMAINING_STATUSES = ['scheduled', 'ongoing']
+SAMPLES = 100_000
+MAX_SAMPLES = 1_000_000
+# samples x activities x houses values held at once
+CHUNK_ELEMENTS = 2_000_000
+# up to this many houses, sample from a precomputed table of all finishing orders
+MAX_TABLE_HOUSES = 6
+
+
+def available():
+    """Whether NumPy is installed, without importing it"""
+    return importlib.util.find_spec('numpy') is not None
+
+
+def load_numpy():
+    import numpy
+    return numpy
+
+
+@dataclass
+class Scenario:
+    houses: list        # [(id, name)]
+    current: object     # current points, one per house
+    points: object      # (activities, houses): points for 1st, 2nd, ... place
+    activities: list    # [(id, name)]
+
+
+def scenario(house_cup_year):
+    """Current standings and the remaining activities of a season"""
+    if not available():
+        raise RuntimeError("The standings simulator needs NumPy (pip install numpy)")
+    np = load_numpy()
+    houses = list(House.objects.order_by('name').values_list('pk', 'name'))
+    totals = dict(
+        HouseStanding.objects.filter(house_cup_year=house_cup_year).values_list('house_id', 'total_points')
+    )
+    remaining = (
+        Activity.objects.filter(house_cup_year=house_cup_year, status__in=REMAINING_STATUSES)
+        .exclude(Exists(Score.objects.filter(activity=OuterRef('pk'))))
+        .order_by('date', 'pk')
+        .only('pk', 'name', 'max_points', 'points_distribution')
+    )
+    activities, points = [], []
+    for activity in remaining:
+        table = activity.points_table
+        activities.append((activity.pk, activity.name))
+        points.append([table.points_for(place) for place in range(1, len(houses) + 1)])
+    return Scenario(
+        houses=houses,
+        current=np.array([totals.get(pk, 0) for pk, _ in houses], dtype=np.int64),
+        points=np.array(points, dtype=np.int64).reshape(len(activities), len(houses)),
+        activities=activities,
+    )
+
+
+def bounds(current, points):
+    """
+    Outcome bounds from current points (houses,) and the remaining points
+    table (activities, houses). Returns a dict of per-house arrays.
+    """
+    np = load_numpy()
+    houses = len(current)
+    best = current + points.max(axis=1).sum()
+    worst = current + points.min(axis=1).sum()
+    # surely_above[i, j]: house i finishes above house j in every outcome
+    surely_above = worst[:, None] > best[None, :]
+    can_be_above = best[:, None] > worst[None, :]
+    np.fill_diagonal(can_be_above, False)
+
+    clinched = surely_above.sum(axis=1) == houses - 1
+    eliminated = surely_above.any(axis=0)
+    # With house h first everywhere, the others split the remaining places;
+    # if any k of them must average more than h's best, one of them beats it
+    others_floor = np.sort(points, axis=1)[:, :-1]  # per activity, without the top prize
+    for h in np.flatnonzero(~eliminated):
+        rivals = np.sort(np.delete(current, h))[::-1]
+        for k in range(1, houses):
+            # the k strongest rivals, each taking the k lowest remaining prizes between them
+            if rivals[:k].sum() + others_floor[:, :k].sum() > k * best[h]:
+                eliminated[h] = True
+                break
+
+    best_finish = 1 + surely_above.sum(axis=0)
+    best_finish[eliminated & (best_finish == 1)] = 2
+    return {
+        'best_points': best,
+        'worst_points': worst,
+        'clinched': clinched,
+        'eliminated': eliminated,
+        'best_finish': best_finish,
+        'worst_finish': 1 + can_be_above.sum(axis=0),
+    }
+
+
+def _orders(houses):
+    """Every finishing order: (orders, houses) array of each house's place index"""
+    np = load_numpy()
+    return np.array(list(itertools.permutations(range(houses))), dtype=np.intp)
+
+
+def sample_totals(current, points, samples, rng):
+    """Yield (chunk, houses) arrays of simulated final totals"""
+    np = load_numpy()
+    activities, houses = points.shape
+    chunk = max(1, CHUNK_ELEMENTS // max(1, activities * houses))
+    if activities == 0:
+        yield np.broadcast_to(current, (samples, houses))
+        return
+    if houses <= MAX_TABLE_HOUSES:
+        orders = _orders(houses)
+        # (activities, orders, houses): points per house for each finishing order
+        order_points = points[:, orders]
+        columns = np.arange(activities)
+    for start in range(0, samples, chunk):
+        size = min(chunk, samples - start)
+        if houses <= MAX_TABLE_HOUSES:
+            picked = rng.integers(0, factorial(houses), (size, activities))
+            earned = order_points[columns, picked]
+        else:
+            places = rng.random((size, activities, houses)).argsort(axis=2)
+            earned = np.take_along_axis(np.broadcast_to(points, (size, activities, houses)), places, axis=2)
+        yield current + earned.sum(axis=1)
+
+
+def monte_carlo(current, points, samples=SAMPLES, seed=0):
+    """
+    Win probability (a tie for first shares the win) and the probability of
+    each finishing place, per house.
+    """
+    np = load_numpy()
+    houses = len(current)
+    rng = np.random.default_rng(seed)
+    wins = np.zeros(houses)
+    finishes = np.zeros((houses, houses))
+    for totals in sample_totals(current, points, samples, rng):
+        leaders = totals == totals.max(axis=1, keepdims=True)
+        wins += (leaders / leaders.sum(axis=1, keepdims=True)).sum(axis=0)
+        # competition rank: 1 + houses strictly ahead
+        places = (totals[:, None, :] > totals[:, :, None]).sum(axis=2)
+        for place in range(houses):
+            finishes[:, place] += (places == place).sum(axis=0)
+    return {'win_probability': wins / samples, 'finish_probabilities': finishes / samples}
+
+
+def simulate(house_cup_year, samples=SAMPLES, seed=0):
+    """JSON-ready what-if standings of a season"""
+    season = scenario(house_cup_year)
+    limits = bounds(season.current, season.points)
+    odds = monte_carlo(season.current, season.points, samples, seed)
+    houses = []
+    for i, (pk, name) in enumerate(season.houses):
+        status = 'clinched' if limits['clinched'][i] else 'eliminated' if limits['eliminated'][i] else 'alive'
+        houses.append({
+            'house': {'id': pk, 'name': name},
+            'current_points': int(season.current[i]),
+            'max_points': int(limits['best_points'][i]),
+            'min_points': int(limits['worst_points'][i]),
+            'status': status,
+            'best_finish': int(limits['best_finish'][i]),
+            'worst_finish': int(limits['worst_finish'][i]),
+            'win_probability': round(float(odds['win_probability'][i]), 4),
+            'finish_probabilities': [round(float(p), 4) for p in odds['finish_probabilities'][i]],
+        })
+    houses.sort(key=lambda house: (-house['win_probability'], -house['current_points'], house['house']['name']))
+    return {
+        'remaining_activities': [{'id': pk, 'name': name} for pk, name in season.activities],
+        'samples': samples,
+        'seed': seed,
+        'houses': houses,
+    }
@@ -0,0 +1,224 @@
+from collections import namedtuple
+from functools import partial
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, QuerySet, Sum
+from django.utils import timezone
+
+from . import standings_cache
+from .live import broker
+from .models import Activity, House_Cup_Year, HouseStanding, Score
+
+# placement -> HouseStanding medal column
+MEDAL_FIELDS = {
+    1: 'first_places',
+    2: 'second_places',
+    3: 'third_places',
+    4: 'fourth_places',
+    5: 'fifth_places',
+}
+TOTAL_FIELDS = ['total_points', *MEDAL_FIELDS.values()]
+
+# What a single Score adds to its house's standing
+Contribution = namedtuple('Contribution', ['house_id', 'house_cup_year_id', 'points', 'placement'])
+
+
+def standing_sort_key(totals):
+    """Order by total points, then most 1st places, 2nd places, and so on"""
+    return tuple(-getattr(totals, field) for field in TOTAL_FIELDS)
+
+
+def assign_ranks(standings):
+    """Sort standings in place and set competition ranks (1, 2, 2, 4)"""
+    standings.sort(key=standing_sort_key)
+    previous_key = None
+    for position, standing in enumerate(standings, start=1):
+        key = standing_sort_key(standing)
+        if key != previous_key:
+            rank = position
+            previous_key = key
+        standing.rank = rank
+    return standings
+
+
+def bump_version(house_cup_year_ids):
+    """Mark the seasons' standings, activities and scores as changed"""
+    if not isinstance(house_cup_year_ids, QuerySet):
+        house_cup_year_ids = list(house_cup_year_ids)
+    # a values_list() queryset runs as a subquery of the one UPDATE
+    House_Cup_Year.objects.filter(pk__in=house_cup_year_ids).update(
+        standings_version=F('standings_version') + 1
+    )
+
+
+def notify_changed(house_cup_year_ids):
+    """Once the transaction commits, drop cached standings and push them to live clients"""
+    house_cup_year_ids = set(house_cup_year_ids)
+    transaction.on_commit(partial(standings_cache.invalidate, house_cup_year_ids))
+    for house_cup_year_id in house_cup_year_ids:
+        transaction.on_commit(partial(broker.publish, house_cup_year_id))
+
+
+def rerank(house_cup_year_id):
+    """Recompute the rank column for one season"""
+    standings = list(HouseStanding.objects.filter(house_cup_year_id=house_cup_year_id))
+    old_ranks = {standing.pk: standing.rank for standing in standings}
+    assign_ranks(standings)
+    changed = [s for s in standings if old_ranks[s.pk] != s.rank]
+    if changed:
+        HouseStanding.objects.bulk_update(changed, ['rank'])
+
+
+def _adjust(contribution, sign):
+    """Add (sign=1) or remove (sign=-1) one score from its house's standing"""
+    updates = {
+        'total_points': F('total_points') + sign * contribution.points,
+        'updated_at': timezone.now(),
+    }
+    medal_field = MEDAL_FIELDS.get(contribution.placement)
+    if medal_field:
+        updates[medal_field] = F(medal_field) + sign
+
+    standing = HouseStanding.objects.filter(
+        house_id=contribution.house_id,
+        house_cup_year_id=contribution.house_cup_year_id,
+    )
+    if standing.update(**updates) or sign < 0:
+        return
+
+    values = {'total_points': contribution.points}
+    if medal_field:
+        values[medal_field] = 1
+    try:
+        with transaction.atomic():
+            HouseStanding.objects.create(
+                house_id=contribution.house_id,
+                house_cup_year_id=contribution.house_cup_year_id,
+                **values
+            )
+    except IntegrityError:
+        # Another writer created the row first
+        standing.update(**updates)
+
+
+def apply_score_change(old, new):
+    """Move a score's contribution from `old` to `new` (either may be None)"""
+    if old == new:
+        return
+    if old:
+        _adjust(old, -1)
+    if new:
+        _adjust(new, 1)
+    for house_cup_year_id in {c.house_cup_year_id for c in (old, new) if c}:
+        rerank(house_cup_year_id)
+
+
+def score_contribution(score, values=None):
+    """Build the Contribution of a score, optionally from previously loaded values"""
+    if values is None:
+        values = {
+            'house_id': score.house_id,
+            'activity_id': score.activity_id,
+            'points_earned': score.points_earned,
+            'placement': score.placement,
+        }
+    if values['activity_id'] == score.activity_id:
+        house_cup_year_id = score.activity.house_cup_year_id
+    else:
+        house_cup_year_id = Activity.objects.filter(
+            pk=values['activity_id']
+        ).values_list('house_cup_year_id', flat=True).first()
+    if house_cup_year_id is None:
+        return None
+    return Contribution(
+        values['house_id'],
+        house_cup_year_id,
+        values['points_earned'] or 0,
+        values['placement'],
+    )
+
+
+def aggregate_standings(house_cup_year_ids=None):
+    """Full aggregate over Score: {(house_cup_year_id, house_id): totals dict}"""
+    scores = Score.objects.all()
+    if house_cup_year_ids is not None:
+        scores = scores.filter(activity__house_cup_year_id__in=house_cup_year_ids)
+    medals = {
+        field: Count('id', filter=Q(placement=placement))
+        for placement, field in MEDAL_FIELDS.items()
+    }
+    rows = (
+        scores.order_by()
+        .values('activity__house_cup_year_id', 'house_id')
+        .annotate(total_points=Sum('points_earned'), **medals)
+    )
+    return {
+        (row['activity__house_cup_year_id'], row['house_id']): {
+            field: row[field] or 0 for field in TOTAL_FIELDS
+        }
+        for row in rows
+    }
+
+
+def recompute_season(house_cup_year_id):
+    """Recompute one season's standings from a full aggregate"""
+    rebuild([house_cup_year_id])
+
+
+def rebuild(house_cup_year_ids=None):
+    """Rebuild standings in bulk from a full aggregate; returns rows written"""
+    totals = aggregate_standings(house_cup_year_ids)
+    by_season = {}
+    for (house_cup_year_id, house_id), values in totals.items():
+        by_season.setdefault(house_cup_year_id, []).append(
+            HouseStanding(house_id=house_id, house_cup_year_id=house_cup_year_id, **values)
+        )
+
+    with transaction.atomic():
+        existing = HouseStanding.objects.all()
+        if house_cup_year_ids is not None:
+            existing = existing.filter(house_cup_year_id__in=house_cup_year_ids)
+        existing.delete()
+
+        standings = []
+        for season_standings in by_season.values():
+            standings.extend(assign_ranks(season_standings))
+        HouseStanding.objects.bulk_create(standings)
+
+        if house_cup_year_ids is None:
+            House_Cup_Year.objects.update(standings_version=F('standings_version') + 1)
+        else:
+            bump_version(house_cup_year_ids)
+    return len(standings)
+
+
+def find_drift(house_cup_year_ids=None):
+    """Compare stored standings to a full aggregate; returns a list of mismatch messages"""
+    expected = aggregate_standings(house_cup_year_ids)
+    stored = HouseStanding.objects.all()
+    if house_cup_year_ids is not None:
+        stored = stored.filter(house_cup_year_id__in=house_cup_year_ids)
+
+    problems = []
+    seen = set()
+    for standing in stored:
+        key = (standing.house_cup_year_id, standing.house_id)
+        seen.add(key)
+        values = expected.get(key, dict.fromkeys(TOTAL_FIELDS, 0))
+        for field in TOTAL_FIELDS:
+            if getattr(standing, field) != values[field]:
+                problems.append(
+                    f"season {key[0]} house {key[1]}: {field} is {getattr(standing, field)}, expected {values[field]}"
+                )
+    for key in expected.keys() - seen:
+        problems.append(f"season {key[0]} house {key[1]}: standing row missing")
+    return problems
+
+
+def current_house_cup_year():
+    """The most recent House Cup Year, or None"""
+    return House_Cup_Year.objects.order_by('-year', '-season').first()
+
+
+async def acurrent_house_cup_year():
+    return await House_Cup_Year.objects.order_by('-year', '-season').afirst()
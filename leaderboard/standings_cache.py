@@ -0,0 +1,136 @@
+"""
+Per-season standings cache.
+
+Entries are keyed by season and by a version number kept in the cache
+itself. Saving or deleting a Score, Activity or House bumps that version
+once the transaction commits (see standings.notify_changed), so stale entries are
+never read again. A miss is recomputed by a single caller: threads of one
+worker wait on a local lock, other workers wait on a lock key in the shared
+cache (file or database backend).
+"""
+import threading
+import time
+from collections import Counter
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+from . import async_cache
+from .models import HouseStanding
+from .serializers import serialize_standing
+
+TIMEOUT = 60 * 60
+LOCK_TIMEOUT = 10
+WAIT_INTERVAL = 0.05
+
+_locks = [threading.Lock() for _ in range(32)]
+_stats_lock = threading.Lock()
+_stats = Counter()
+
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def stats():
+    """Hit/miss counters for this worker process"""
+    with _stats_lock:
+        return {name: _stats[name] for name in ['hits', 'misses', 'recomputes', 'coalesced']}
+
+
+def reset_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+def _version_key(house_cup_year_id):
+    return f'standings:{house_cup_year_id}:version'
+
+
+def get_version(house_cup_year_id):
+    key = _version_key(house_cup_year_id)
+    version = cache.get(key)
+    if version is None:
+        # Any fresh number works; never reuse entries written before an eviction
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+async def aget_version(house_cup_year_id):
+    version = await async_cache.get(_version_key(house_cup_year_id))
+    if version is None:
+        version = await sync_to_async(get_version)(house_cup_year_id)
+    return version
+
+
+def invalidate(house_cup_year_ids):
+    """Make the cached standings of these seasons unreachable"""
+    for house_cup_year_id in house_cup_year_ids:
+        try:
+            cache.incr(_version_key(house_cup_year_id))
+        except ValueError:
+            cache.add(_version_key(house_cup_year_id), time.time_ns(), timeout=None)
+
+
+def read_standings(house_cup_year_id):
+    # from the primary: a lagging replica would cache old rows under the new version
+    rows = (
+        HouseStanding.objects.using(DEFAULT_DB_ALIAS).filter(house_cup_year_id=house_cup_year_id)
+        .select_related('house')
+        .order_by('rank', 'house__name')
+    )
+    return [serialize_standing(row) for row in rows]
+
+
+def get_standings(house_cup_year_id):
+    """Serialized standings of one season, from the cache when possible"""
+    key = f'standings:{house_cup_year_id}:v{get_version(house_cup_year_id)}'
+    rows = cache.get(key)
+    if rows is not None:
+        _count('hits')
+        return rows
+    _count('misses')
+    return _single_flight(key, lambda: read_standings(house_cup_year_id))
+
+
+async def aget_standings(house_cup_year_id):
+    """get_standings() for async views: hits are read through async_cache"""
+    key = f'standings:{house_cup_year_id}:v{await aget_version(house_cup_year_id)}'
+    rows = await async_cache.get(key)
+    if rows is not None:
+        _count('hits')
+        return rows
+    # the single-flight wait blocks; misses are rare enough to take a thread
+    return await sync_to_async(get_standings)(house_cup_year_id)
+
+
+def _single_flight(key, compute):
+    with _locks[hash(key) % len(_locks)]:
+        value = cache.get(key)
+        if value is not None:
+            _count('coalesced')
+            return value
+
+        lock_key = f'{key}:lock'
+        owner = cache.add(lock_key, True, timeout=LOCK_TIMEOUT)
+        if not owner:
+            # Another worker is recomputing; wait for its result
+            deadline = time.monotonic() + LOCK_TIMEOUT
+            while time.monotonic() < deadline:
+                time.sleep(WAIT_INTERVAL)
+                value = cache.get(key)
+                if value is not None:
+                    _count('coalesced')
+                    return value
+
+        try:
+            value = compute()
+            cache.set(key, value, TIMEOUT)
+            _count('recomputes')
+        finally:
+            if owner:
+                cache.delete(lock_key)
+        return value
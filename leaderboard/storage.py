@@ -0,0 +1,68 @@
+"""
+Static files storage for production (DEBUG off).
+
+collectstatic writes every file under a content-hashed name
+(ManifestStaticFilesStorage), so those URLs can be cached by browsers for a
+year, and puts a .gz copy (and a .br copy when the brotli package is
+installed) of each compressible file next to it. views.static_file picks
+the variant the client accepts.
+"""
+import gzip
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:  # .br variants are optional
+    brotli = None
+
+# images and fonts like woff2 are already compressed
+COMPRESSIBLE = ('.css', '.js', '.mjs', '.map', '.json', '.svg', '.txt', '.html', '.xml', '.ttf', '.otf', '.ico')
+MIN_SIZE = 256
+# suffix -> Content-Encoding, in order of preference
+VARIANTS = {'.br': 'br', '.gz': 'gzip'}
+
+
+def compress(content):
+    """{suffix: data} for each variant that is actually smaller"""
+    variants = {'.gz': gzip.compress(content, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants['.br'] = brotli.compress(content)
+    return {suffix: data for suffix, data in variants.items() if len(data) < len(content)}
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    # flowbite.min.js points at a source map that is not vendored; only
+    # rewrite references inside stylesheets
+    patterns = tuple(
+        (extension, patterns) for extension, patterns in ManifestStaticFilesStorage.patterns
+        if extension == '*.css'
+    )
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        # the manifest is complete here; compress only the names pages link to
+        for name in set(self.hashed_files.values()):
+            if name.lower().endswith(COMPRESSIBLE):
+                self.write_variants(name)
+
+    def write_variants(self, name):
+        with self.open(name) as file:
+            content = file.read()
+        if len(content) < MIN_SIZE:
+            return
+        for suffix, data in compress(content).items():
+            if self.exists(name + suffix):
+                self.delete(name + suffix)
+            self._save(name + suffix, ContentFile(data))
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            # e.g. dist/style.css before the Tailwind build has run: link the
+            # plain name (short-lived cache) rather than fail every page
+            return name
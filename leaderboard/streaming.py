@@ -0,0 +1,35 @@
+"""
+Streaming responses that stay streamed under ASGI.
+
+Under ASGI, Django reads a sync iterator through sync_to_async(list), so
+the whole body is built in memory before the first byte goes out. stream()
+swaps in an async iterator that pulls `batch` parts at a time in a worker
+thread. Under WSGI the response is left alone: there an async iterator
+would be buffered instead.
+"""
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+
+# parts fetched per thread hop: CSV lines, or file blocks (64 KB under ASGI)
+BATCH = 500
+FILE_BATCH = 4
+
+
+def _next_batch(iterator, batch):
+    return list(islice(iterator, batch))
+
+
+async def _batched(iterator, batch):
+    while parts := await sync_to_async(_next_batch)(iterator, batch):
+        for part in parts:
+            yield part
+
+
+def stream(request, response, batch=BATCH):
+    """Return `response` (a StreamingHttpResponse or FileResponse) ready for the handler serving `request`"""
+    if isinstance(request, ASGIRequest) and response.streaming and not response.is_async:
+        # FileResponse keeps its headers and closes the file as before
+        response.streaming_content = _batched(iter(response.streaming_content), batch)
+    return response
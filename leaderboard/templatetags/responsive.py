@@ -0,0 +1,41 @@
+from django import template
+from django.templatetags.static import static
+from django.utils.html import format_html, format_html_join
+
+from .. import images
+
+register = template.Library()
+
+
+@register.simple_tag
+def responsive_image(name, alt='', sizes='100vw', loading='lazy', **attrs):
+    """
+    <picture> of static image `name` with AVIF/WebP srcsets from
+    build_images, falling back to the original. Keyword arguments become
+    <img> attributes; pass loading="eager" (and fetchpriority="high") for
+    images in the first screen.
+
+        {% responsive_image 'imgs/aclcxp.jpg' alt="" sizes="100vw" class="w-full" %}
+    """
+    entry = images.load_manifest().get(name)
+    attrs = {'alt': alt, 'loading': loading, 'decoding': 'async', **attrs}
+    if entry:
+        attrs.setdefault('width', entry['width'])
+        attrs.setdefault('height', entry['height'])
+    img = format_html(
+        '<img src="{}" {}>',
+        static(name),
+        format_html_join(' ', '{}="{}"', attrs.items()),
+    )
+    if not entry:
+        return img
+    sources = format_html_join(
+        '', '<source type="{}" srcset="{}" sizes="{}">',
+        (
+            (images.MIME_TYPES[fmt], ', '.join(f'{static(variant)} {width}w' for width, variant in variants), sizes)
+            for fmt, variants in entry['variants'].items()
+            if variants
+        ),
+    )
+    # display: contents keeps the <img> laid out as if it had no wrapper
+    return format_html('<picture style="display: contents">{}{}</picture>', sources, img)
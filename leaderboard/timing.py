@@ -0,0 +1,179 @@
+"""
+Per-request cost: SQL queries, DB time, template render time and latency.
+
+RequestTimingMiddleware (first in MIDDLEWARE) measures every request and
+reports it two ways: a Server-Timing header that browser dev tools show
+next to the request, and a structured log line on the
+"leaderboard.requests" logger (the numbers are also in the record's
+`timing` attribute for JSON formatters).
+
+Views declare how many queries they may run with @query_budget(n); for an
+admin page, decorate the ModelAdmin view method. Going over budget logs a
+warning, and raises QueryBudgetExceeded when QUERY_BUDGET_STRICT is on, as
+it is in the test suite, so an N+1 regression fails the tests that hit it.
+
+Works under WSGI and ASGI: the counters live in a context variable, which
+follows the request into the threads sync code runs in.
+
+Template time comes from TimedDjangoTemplates, the Django template backend
+with each top-level render timed; settings.TEMPLATES names it as BACKEND.
+Nothing outside that engine is patched.
+"""
+import functools
+import logging
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.template import TemplateDoesNotExist
+from django.template.backends.django import DjangoTemplates, Template, reraise
+
+logger = logging.getLogger('leaderboard.requests')
+
+_current = ContextVar('leaderboard_request_timing', default=None)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def query_budget(queries):
+    """Declare the most SQL queries a view may run per request"""
+    def decorator(view):
+        view.query_budget = queries
+        return view
+    return decorator
+
+
+class RequestStats:
+    __slots__ = ['start', 'queries', 'db', 'templates']
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.queries = 0
+        self.db = 0.0
+        self.templates = 0.0
+
+
+def _record_query(execute, sql, params, many, context):
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.db += time.perf_counter() - start
+
+
+def _watch(connection):
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+def _on_connection_created(sender, connection, **kwargs):
+    _watch(connection)
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        stats = _current.get()
+        if stats is None:
+            return super().render(context, request)
+        start = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            stats.templates += time.perf_counter() - start
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """
+    DjangoTemplates whose templates add their render time to the current
+    request's stats. Only the backend's templates are timed, so {% include %}
+    and {% extends %} count as part of their page.
+    """
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return TimedTemplate(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
+
+
+def install():
+    """Hook query timing in; idempotent"""
+    # connections are per thread; ones opened later are hooked on creation
+    connection_created.connect(_on_connection_created, dispatch_uid='leaderboard.timing')
+    for connection in connections.all(initialized_only=True):
+        _watch(connection)
+
+
+class RequestTimingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        install()
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        for connection in connections.all(initialized_only=True):
+            _watch(connection)
+        stats = RequestStats()
+        token = _current.set(stats)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.report(request, response, stats)
+
+    async def __acall__(self, request):
+        stats = RequestStats()
+        token = _current.set(stats)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.report(request, response, stats)
+
+    def report(self, request, response, stats):
+        total = time.perf_counter() - stats.start
+        match = request.resolver_match
+        budget = getattr(match.func, 'query_budget', None) if match else None
+        timing = {
+            'view': match.view_name if match else None,
+            'queries': stats.queries,
+            'query_budget': budget,
+            'db_ms': round(stats.db * 1000, 1),
+            'template_ms': round(stats.templates * 1000, 1),
+            'total_ms': round(total * 1000, 1),
+        }
+        response['Server-Timing'] = (
+            f'db;dur={timing["db_ms"]};desc="{stats.queries} queries", '
+            f'tpl;dur={timing["template_ms"]}, '
+            f'total;dur={timing["total_ms"]}'
+        )
+        logger.info(
+            "%s %s %s view=%s queries=%d db_ms=%.1f template_ms=%.1f total_ms=%.1f",
+            request.method, request.path, response.status_code, timing['view'], stats.queries,
+            timing['db_ms'], timing['template_ms'], timing['total_ms'],
+            extra={'timing': timing},
+        )
+        if budget is not None and stats.queries > budget:
+            message = f"{timing['view']} ran {stats.queries} queries; its budget is {budget}"
+            logger.warning(message, extra={'timing': timing})
+            if getattr(settings, 'QUERY_BUDGET_STRICT', False):
+                raise QueryBudgetExceeded(message)
+        return response
@@ -1,4 +1,3 @@
-from atexit import register
 from django.urls import path
 from . import views
 
@@ -7,5 +6,6 @@ urlpatterns = [
     path('login/', views.login, name='login'),
     path('', views.landing_page, name='home'),
     path('about/',views.about, name='about'),
-    path('register/',views.register, name='register')
+    path('register/',views.register, name='register'),
+    path('live/standings/', views.live_standings, name='live_standings'),
 ]
\ No newline at end of file
@@ -1,13 +1,108 @@
+import mimetypes
+import os
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.handlers.asgi import ASGIRequest
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
 from django.shortcuts import render
+from django.utils._os import safe_join
+from django.utils.cache import patch_vary_headers
+
+from . import streaming
+from .api_views import _seasons
+from .live import broker
+from .page_cache import acached_render, cached_render
+from .standings import acurrent_house_cup_year
+from .standings_cache import aget_standings, aget_version
+from .storage import VARIANTS
+from .timing import query_budget
+
+# fingerprinted static names never change content
+IMMUTABLE = 'public, max-age=31536000, immutable'
+SHORT_LIVED = 'public, max-age=300'
 
 # Create your views here.
-def landing_page(request):
-    return render(request, "landing.html")
+# session + user when logged in, the season and its standings on a cache miss
+@query_budget(4)
+async def landing_page(request):
+    # the page key and the nav read request.user; load it without a blocking query
+    request.user = await request.auser()
+    house_cup_year = await acurrent_house_cup_year()
+    # a new standings version (any score change) is a new page
+    version = f'{house_cup_year.pk}.{await aget_version(house_cup_year.pk)}' if house_cup_year else None
 
+    async def context():
+        return {
+            'house_cup_year': house_cup_year,
+            'standings': await aget_standings(house_cup_year.pk) if house_cup_year else [],
+        }
+    return await acached_render(request, "landing.html", context, version=version)
+
+@query_budget(2)
 def about(request):
-    return render(request,"about.html")
+    return cached_render(request, "about.html")
 def register(request):
     return render(request,"register.html")
 
 def login(request):
     return render(request,"login.html")
+
+async def live_standings(request):
+    """Server-Sent Events stream of standings changes (ASGI only)"""
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse("Live standings need the ASGI server.", status=501)
+    
+    # ?season= as the API reads it: Http404 unless it is an id
+    house_cup_year_id = await _seasons(request).values_list('pk', flat=True).afirst()
+    if house_cup_year_id is None:
+        return HttpResponse("No House Cup Year found.", status=404)
+    
+    last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        last_event_id = None
+    
+    response = StreamingHttpResponse(
+        broker.stream(house_cup_year_id, last_event_id),
+        content_type='text/event-stream',
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+
+def static_file(request, path):
+    """
+    Serve a file collected into STATIC_ROOT (DEBUG off; runserver serves
+    static files itself in development). Fingerprinted names are cacheable
+    for a year; a precompressed variant is sent when the client accepts it.
+    """
+    if not settings.STATIC_ROOT:
+        raise Http404
+    try:
+        full_path = safe_join(settings.STATIC_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404
+    if not os.path.isfile(full_path):
+        raise Http404
+
+    accepted = {part.split(';')[0].strip() for part in request.headers.get('Accept-Encoding', '').split(',')}
+    encoding = None
+    for suffix, name in VARIANTS.items():
+        if name in accepted and os.path.isfile(full_path + suffix):
+            full_path += suffix
+            encoding = name
+            break
+
+    content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+    response = FileResponse(open(full_path, 'rb'), content_type=content_type, filename=os.path.basename(path))
+    if encoding:
+        response['Content-Encoding'] = encoding
+    patch_vary_headers(response, ['Accept-Encoding'])
+    hashed_names = getattr(staticfiles_storage, 'hashed_files', {}).values()
+    response['Cache-Control'] = IMMUTABLE if path in hashed_names else SHORT_LIVED
+    return streaming.stream(request, response, batch=streaming.FILE_BATCH)